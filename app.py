@@ -3,6 +3,12 @@ import os
 
 st.set_page_config(page_title="Dashboard Empresarial", layout="wide")
 
+# -------- Pré-carga das planilhas em segundo plano (uma vez por processo) --------
+from aquecimento import iniciar_aquecimento, painel_aquecimento
+from vigia_arquivos import iniciar_vigia, aviso_atualizacao
+iniciar_aquecimento(os.path.dirname(os.path.abspath(__file__)))
+iniciar_vigia(os.path.dirname(os.path.abspath(__file__)))
+
 # -------- CSS: Sidebar moderna, responsiva, sem overlay --------
 st.markdown("""
     <style>
@@ -91,7 +97,6 @@ with st.sidebar:
         st.session_state.menu_lateral = menu_itens[0]["key"]
 
     for item in menu_itens:
-        is_selected = st.session_state.menu_lateral == item["key"]
         btn = st.button(
             f"{item['ico']} {item['label']}",
             key=f"menu_btn_{item['key']}",
@@ -99,19 +104,28 @@ with st.sidebar:
         )
         if btn:
             st.session_state.menu_lateral = item["key"]
-        # CSS para destacar o selecionado
-        st.markdown(
-            f"""
-            <style>
-            [data-testid="stSidebar"] button#{'menu_btn_' + item['key']} {{
-                {"background: #21242b; color: #60ecff; border-left: 5px solid #2697f5; font-weight: bold;" if is_selected else ""}
-            }}
-            </style>
-            """, unsafe_allow_html=True
-        )
+    # CSS para destacar o selecionado: um bloco só, depois dos cliques (e não um por item)
+    st.markdown(
+        f"""
+        <style>
+        [data-testid="stSidebar"] button#{'menu_btn_' + st.session_state.menu_lateral} {{
+            background: #21242b; color: #60ecff; border-left: 5px solid #2697f5; font-weight: bold;
+        }}
+        </style>
+        """, unsafe_allow_html=True
+    )
 
 menu_lateral = st.session_state.menu_lateral
 
+# ----------- DIAGNÓSTICO (memória dos datasets carregados) -----------
+from memoria import painel_memoria
+from cache_compartilhado import painel_cache
+with st.sidebar:
+    aviso_atualizacao()
+    painel_aquecimento()
+    painel_memoria()
+    painel_cache()
+
 # ----------- CHAMADAS DO MENU -----------
 
 if menu_lateral == "Dashboard":
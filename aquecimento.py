@@ -0,0 +1,183 @@
+import os
+import threading
+import time
+import streamlit as st
+from cache_dados import impressao_digital
+
+# Pré-carga dos datasets ao subir o servidor: uma thread lê as planilhas das pastas das páginas
+# e deixa o resultado no cache compartilhado, então o primeiro clique no menu já encontra os dados.
+# POWEBI_AQUECER=0 desliga (ex.: máquina de desenvolvimento).
+AQUECER = os.environ.get("POWEBI_AQUECER", "1") != "0"
+# Intervalo (s) de atualização do indicador enquanto a pré-carga roda
+INTERVALO_STATUS = 2
+
+_trava = threading.Lock()
+_STREAMING = set()  # planilhas lidas em blocos (fora da leitura paralela)
+_estado = {"iniciado": False, "total": 0, "concluidas": 0, "atual": None, "erros": [], "inicio": None, "fim": None}
+
+def _xlsx(pasta):
+    if not os.path.isdir(pasta):
+        return []
+    return sorted(
+        os.path.join(pasta, f) for f in os.listdir(pasta) if f.lower().endswith(".xlsx") and not f.startswith("~$")
+    )
+
+def _tarefas_financeiro(pasta):
+    # Mesmas chamadas que as páginas fazem ao abrir (prepara_* e conciliação/pareamento com a tolerância padrão)
+    from conciliacao import TOLERANCIA_DIAS
+    from conc_bancario import prepara_extrato, concilia_com_movimentacao
+    from mov_cc import prepara_planilha as prepara_movimentacao, arquivo_movimentacao
+    from transf_cc import prepara_planilha as prepara_transferencias, pareia_transferencias
+    tarefas = []
+    for caminho in _xlsx(pasta):
+        nome = os.path.basename(caminho).lower()
+        if "concil" in nome or "extrato" in nome:
+            tarefas.append((caminho, lambda c=caminho: prepara_extrato(c, impressao_digital(c)), (caminho,)))
+            arquivo_mov = arquivo_movimentacao(caminho)
+            if arquivo_mov:
+                tarefas.append((caminho, lambda c=caminho, m=arquivo_mov: concilia_com_movimentacao(
+                    c, impressao_digital(c), m, impressao_digital(m), TOLERANCIA_DIAS
+                ), (caminho, arquivo_mov)))
+        elif "transf" in nome:
+            tarefas.append((caminho, lambda c=caminho: prepara_transferencias(c, impressao_digital(c)), (caminho,)))
+            arquivo_mov = arquivo_movimentacao(caminho)
+            if arquivo_mov:
+                tarefas.append((caminho, lambda m=arquivo_mov: pareia_transferencias(
+                    m, impressao_digital(m), TOLERANCIA_DIAS
+                ), (arquivo_mov,)))
+        elif "mov" in nome:
+            tarefas.append((caminho, lambda c=caminho: prepara_movimentacao(c, impressao_digital(c)), (caminho,)))
+    return tarefas
+
+def _tarefas_contas_pagar(pasta):
+    from contas_pagar import planilhas_contas_pagar, prepara_planilha, esquema_debito
+    from ingestao_stream import resumir_em_blocos
+    if not os.path.isdir(pasta):
+        return []
+    planilhas = planilhas_contas_pagar(pasta)
+    tarefas = [
+        (planilhas[chave], lambda c=planilhas[chave]: prepara_planilha(c, impressao_digital(c)), (planilhas[chave],))
+        for chave in ("quebra", "sangria", "principal") if planilhas[chave] and os.path.exists(planilhas[chave])
+    ]
+    if os.path.exists(planilhas["debito"]):
+        def resumo_debito(c=planilhas["debito"]):
+            # Opções dos filtros de Débito/Crédito/PIX (uma passada em streaming)
+            esquema, faceta_cols = esquema_debito(c)
+            resumir_em_blocos(c, faceta_cols, esquema.get("data"))
+        tarefas.append((planilhas["debito"], resumo_debito, (planilhas["debito"],)))
+        _STREAMING.add(planilhas["debito"])
+    return tarefas
+
+def _tarefas_orcamento(pasta):
+    from orcamento import prepara_orcamento, arquivo_padrao
+    arquivos = _xlsx(pasta)
+    padrao = arquivo_padrao([os.path.basename(c) for c in arquivos])
+    if not padrao:
+        return []
+    caminho = os.path.join(pasta, padrao)
+    return [(caminho, lambda: prepara_orcamento(caminho, impressao_digital(caminho)), (caminho,))]
+
+def listar_tarefas(raiz):
+    # (arquivo, função, arquivos de que depende) de cada pasta: dashboard, financeiro,
+    # contas_pagar e orcamento
+    from kpis import somar_kpis
+    from ingestao_paralela import ler_planilhas
+    tarefas = []
+    kpis = _xlsx(os.path.join(raiz, "dashboard"))
+    if kpis:
+        tarefas.append((os.path.join(raiz, "dashboard"), lambda: somar_kpis(kpis), tuple(kpis)))
+    paginas = (
+        _tarefas_financeiro(os.path.join(raiz, "financeiro"))
+        + _tarefas_contas_pagar(os.path.join(raiz, "contas_pagar"))
+        + _tarefas_orcamento(os.path.join(raiz, "orcamento"))
+    )
+    # Antes dos prepara_*, as planilhas lidas inteiras são convertidas para Parquet em paralelo
+    # (ingestao_paralela); cada prepara_* depois só lê o cache. A de Débito/Crédito/PIX, lida em
+    # streaming, fica de fora.
+    inteiras = list(dict.fromkeys(c for c, _, _ in paginas if c not in _STREAMING))
+    if inteiras:
+        tarefas.append((os.path.join(raiz, "planilhas"), lambda: ler_planilhas(inteiras, devolver=False), tuple(inteiras)))
+    return tarefas + paginas
+
+def _executar(tarefas):
+    for caminho, funcao, _ in tarefas:
+        with _trava:
+            _estado["atual"] = os.path.basename(caminho)
+        try:
+            funcao()
+        except Exception as e:
+            # Erro numa planilha não interrompe as demais; a página mostra o erro quando for aberta
+            with _trava:
+                _estado["erros"].append(f"{os.path.basename(caminho)}: {e}")
+        with _trava:
+            _estado["concluidas"] += 1
+    with _trava:
+        _estado["atual"] = None
+        _estado["fim"] = time.time()
+
+def iniciar_aquecimento(raiz):
+    # Uma vez por processo (a primeira sessão dispara); as seguintes só consultam o estado.
+    # Um clique que chegue antes da thread terminar espera o mesmo cálculo (trava por chave do cache).
+    with _trava:
+        if _estado["iniciado"] or not AQUECER:
+            return
+        _estado["iniciado"] = True
+        _estado["inicio"] = time.time()
+    try:
+        tarefas = listar_tarefas(raiz)
+    except Exception as e:
+        tarefas = []
+        with _trava:
+            _estado["erros"].append(str(e))
+    with _trava:
+        _estado["total"] = len(tarefas)
+    threading.Thread(target=_executar, args=(tarefas,), name="aquecimento", daemon=True).start()
+
+def recarregar(raiz, caminhos):
+    # Refaz só as tarefas que dependem dos arquivos alterados (vigia_arquivos); as demais planilhas
+    # seguem no cache. Devolve os erros, no mesmo formato do estado da pré-carga.
+    alterados = {os.path.abspath(c) for c in caminhos}
+    erros = []
+    for caminho, funcao, dependencias in listar_tarefas(raiz):
+        if alterados.isdisjoint(os.path.abspath(d) for d in dependencias):
+            continue
+        try:
+            funcao()
+        except Exception as e:
+            erros.append(f"{os.path.basename(caminho)}: {e}")
+    return erros
+
+def estado_aquecimento():
+    with _trava:
+        return {**_estado, "erros": list(_estado["erros"])}
+
+def _mostrar_estado(estado):
+    if estado["fim"] is None:
+        st.progress(
+            estado["concluidas"] / estado["total"] if estado["total"] else 0.0,
+            text=f"Pré-carregando dados... {estado['concluidas']}/{estado['total']}"
+            + (f" ({estado['atual']})" if estado["atual"] else "")
+        )
+    else:
+        st.caption(f"✅ Dados pré-carregados ({estado['total']} itens em {estado['fim'] - estado['inicio']:.1f} s)")
+    for erro in estado["erros"]:
+        st.caption(f"⚠️ {erro}")
+
+@st.fragment(run_every=INTERVALO_STATUS)
+def _estado_ao_vivo():
+    estado = estado_aquecimento()
+    if estado["fim"] is not None:
+        # Terminou: uma reexecução da página troca o fragmento pelo indicador estático, o que
+        # desliga o timer (senão ele seguiria consultando a cada INTERVALO_STATUS)
+        st.rerun(scope="app")
+    _mostrar_estado(estado)
+
+def painel_aquecimento():
+    # Indicador na barra lateral; enquanto a pré-carga roda, atualiza sozinho sem reexecutar a página
+    estado = estado_aquecimento()
+    if not estado["iniciado"]:
+        return
+    if estado["fim"] is None:
+        _estado_ao_vivo()
+    else:
+        _mostrar_estado(estado)
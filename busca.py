@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+from cache_compartilhado import memorizar
+
+# Separa as células de uma linha no texto indexado (nunca aparece numa busca digitada)
+SEPARADOR = "\x1f"
+
+def normalizar_texto(serie):
+    # Minúsculas e sem acentos, para "Participações" casar com "participacoes"
+    return (
+        serie.str.normalize("NFKD")
+        .str.encode("ascii", "ignore")
+        .str.decode("ascii")
+        .str.lower()
+    )
+
+def _minusculas(serie):
+    # Minúsculas com espaços colapsados, mantendo os acentos
+    return serie.str.lower().str.replace(r"\s+", " ", regex=True).str.strip()
+
+def _colunas_normalizadas(df):
+    # Normaliza só os valores distintos de cada coluna; o código -1 (vazio) aponta para "".
+    # Devolve os valores sem acento (índice) e com acento (consultas acentuadas).
+    for col in df.columns:
+        codigos, unicos = pd.factorize(df[col])
+        originais = pd.Series(pd.Index(unicos).astype(str), dtype=object)
+        valores = normalizar_texto(originais).str.replace(r"\s+", " ", regex=True).str.strip()
+        acentuados = _minusculas(originais)
+        yield codigos, np.append(valores.to_numpy(dtype=object), ""), np.append(acentuados.to_numpy(dtype=object), "")
+
+def construir_indice_busca(df):
+    # Texto normalizado por linha + índice invertido token -> linhas.
+    # As linhas são as posições em `df` (0..n-1); tokens saem dos valores distintos de cada coluna.
+    n = len(df)
+    colunas = list(_colunas_normalizadas(df))
+    texto = np.full(n, "", dtype=object)
+    texto_acentuado = np.full(n, "", dtype=object)
+    for i, (codigos, valores, acentuados) in enumerate(colunas):
+        texto = valores[codigos] if i == 0 else texto + SEPARADOR + valores[codigos]
+        texto_acentuado = acentuados[codigos] if i == 0 else texto_acentuado + SEPARADOR + acentuados[codigos]
+    colunas = [(codigos, valores) for codigos, valores, _ in colunas]
+
+    tokens_por_coluna = [pd.Series(valores).str.split().explode().dropna() for _, valores in colunas]
+    todos = pd.concat(tokens_por_coluna) if tokens_por_coluna else pd.Series([], dtype=object)
+    ids, vocabulario = pd.factorize(todos.to_numpy(dtype=object), sort=True)
+
+    chaves = []
+    fim = 0
+    for (codigos, valores), tokens in zip(colunas, tokens_por_coluna):
+        ids_col = ids[fim:fim + len(tokens)]
+        fim += len(tokens)
+        # tokens[i] pertence ao valor distinto tokens.index[i]; espalha para as linhas com esse valor
+        qtd = np.bincount(tokens.index.to_numpy(dtype=np.int64), minlength=len(valores))
+        inicio_valor = np.concatenate(([0], np.cumsum(qtd)[:-1]))
+        qtd_linha = qtd[codigos]
+        total = qtd_linha.sum()
+        posicao = np.repeat(inicio_valor[codigos] - (np.cumsum(qtd_linha) - qtd_linha), qtd_linha) + np.arange(total)
+        linhas = np.repeat(np.arange(n, dtype=np.int64), qtd_linha)
+        chaves.append(ids_col[posicao].astype(np.int64) * max(n, 1) + linhas)
+
+    # Ordenar por (token, linha) já deixa as listas de linhas agrupadas por token
+    chaves = np.sort(np.concatenate(chaves)) if chaves else np.array([], dtype=np.int64)
+    chaves = chaves[np.concatenate(([True], chaves[1:] != chaves[:-1]))] if len(chaves) else chaves
+    token_da_chave = chaves // max(n, 1)
+    return {
+        "n_linhas": n,
+        "texto": texto,
+        "texto_acentuado": texto_acentuado,
+        "vocabulario": pd.Series(vocabulario, dtype=object),
+        "linhas": (chaves % max(n, 1)).astype(np.int32),
+        "inicio": np.searchsorted(token_da_chave, np.arange(len(vocabulario) + 1)),
+    }
+
+def indice_busca(chave, df):
+    # Devolve o índice de `df`, montando só na primeira vez para a mesma chave (ex.: impressão digital)
+    # (no cache compartilhado, com o mesmo orçamento dos datasets)
+    return memorizar("busca", chave, lambda: construir_indice_busca(df))
+
+def _linhas_do_termo(indice, termo):
+    # Tokens do vocabulário que contêm o termo -> união das linhas desses tokens
+    achados = np.flatnonzero(indice["vocabulario"].str.contains(termo, regex=False).to_numpy())
+    resultado = np.zeros(indice["n_linhas"], dtype=bool)
+    if len(achados):
+        inicios = indice["inicio"][achados]
+        tamanhos = indice["inicio"][achados + 1] - inicios
+        deslocamento = np.repeat(inicios - np.concatenate(([0], np.cumsum(tamanhos)[:-1])), tamanhos)
+        resultado[indice["linhas"][deslocamento + np.arange(tamanhos.sum())]] = True
+    return resultado
+
+def buscar(indice, consulta):
+    # Máscara booleana (por posição) das linhas que contêm a consulta, sem diferenciar maiúsculas.
+    # Consulta sem acento ignora os acentos do texto ("participacoes" acha "Participações");
+    # consulta com acento ou símbolo exige o caractere digitado ("ç" acha "ç", não todo "c").
+    # Só a consulta vazia (ou só espaços) devolve todas as linhas.
+    digitada = _minusculas(pd.Series([str(consulta)], dtype=object)).iloc[0]
+    if not digitada:
+        return np.ones(indice["n_linhas"], dtype=bool)
+    dobrada = normalizar_texto(pd.Series([digitada], dtype=object)).iloc[0]
+    termos = dobrada.split()
+    if termos:
+        mascara = _linhas_do_termo(indice, termos[0])
+        for termo in termos[1:]:
+            mascara &= _linhas_do_termo(indice, termo)
+    else:
+        mascara = np.ones(indice["n_linhas"], dtype=bool)  # ex.: "€": nada sobra sem acento/símbolo
+    if dobrada != digitada:
+        texto, frase = indice["texto_acentuado"], digitada
+    elif len(termos) > 1:
+        texto, frase = indice["texto"], " ".join(termos)
+    else:
+        return mascara
+    # Confirma a frase exata (com ou sem acentos) só nas linhas candidatas
+    candidatas = np.flatnonzero(mascara)
+    confirma = pd.Series(texto[candidatas], dtype=object).str.contains(frase, regex=False).to_numpy(dtype=bool)
+    mascara[:] = False
+    mascara[candidatas[confirma]] = True
+    return mascara
+
+def filtrar_por_busca(df, indice, consulta):
+    # `df` pode já estar filtrado, desde que o índice seja o do dataset completo (RangeIndex)
+    mascara = buscar(indice, consulta)
+    return df[mascara[df.index.to_numpy()]]
@@ -0,0 +1,181 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from functools import wraps
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Cache dos datasets preparados, único por processo: todas as sessões (usuários) recebem os mesmos
+# objetos em vez de cada uma guardar a sua cópia, como no st.cache_data.
+# Os resultados derivados (filtros, índices de busca, ordens da grade, cubos, exportações) ficam no
+# mesmo cache, por espaço de nomes (memorizar/consultar/guardar).
+# Orçamento de memória em MB (variável de ambiente POWEBI_CACHE_MB), para tudo isso junto; passando
+# dele, saem os itens usados há mais tempo.
+ORCAMENTO_MB = float(os.environ.get("POWEBI_CACHE_MB", "512"))
+
+_itens = OrderedDict()  # chave -> (valor, bytes), do menos para o mais recentemente usado
+_carregando = {}  # chave -> Lock: sessões pedindo o mesmo dataset esperam um único cálculo
+_mantidos = set()  # chaves que não saem em descartar_arquivo (ver guardar)
+_trava = threading.Lock()
+_contadores = {"acertos": 0, "faltas": 0, "despejos": 0, "descartes": 0}
+_uso = {"bytes": 0}
+
+def _tamanho(valor):
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(deep=True).sum())
+    if isinstance(valor, pd.Series):
+        return int(valor.memory_usage(deep=True))
+    if isinstance(valor, np.ndarray):
+        if valor.dtype == object:  # texto: conta as strings, não só os ponteiros
+            return int(pd.Series(valor.ravel(), copy=False).memory_usage(deep=True, index=False))
+        return valor.nbytes
+    if isinstance(valor, dict):
+        return sum(_tamanho(v) for v in valor.values())
+    if isinstance(valor, (list, tuple)):
+        return sum(_tamanho(v) for v in valor)
+    return sys.getsizeof(valor)
+
+def _congelar(valor):
+    # Arrays guardados ficam somente-leitura: uma sessão não consegue alterar o que as outras veem
+    if isinstance(valor, np.ndarray):
+        valor.flags.writeable = False
+    elif isinstance(valor, dict):
+        for v in valor.values():
+            _congelar(v)
+    elif isinstance(valor, (list, tuple)):
+        for v in valor:
+            _congelar(v)
+    return valor
+
+def _entregar(valor):
+    # DataFrames saem como cópia rasa: com copy-on-write do pandas (padrão a partir do pandas 3,
+    # fixado no requirements.txt) os dados são compartilhados e qualquer alteração feita pela página
+    # copia só o que mudou, sem tocar no objeto do cache
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return valor.copy(deep=False)
+    if isinstance(valor, tuple):
+        return tuple(_entregar(v) for v in valor)
+    return valor
+
+def _remover(chave):
+    # Chamado com a trava
+    _uso["bytes"] -= _itens.pop(chave)[1]
+    _mantidos.discard(chave)
+
+def _inserir(chave, valor):
+    # Chamado com a trava: guarda e tira os menos usados até caber no orçamento (o último item sempre fica)
+    if chave in _itens:
+        _remover(chave)
+    _itens[chave] = (valor, _tamanho(valor))
+    _uso["bytes"] += _itens[chave][1]
+    limite = ORCAMENTO_MB * 2**20
+    while len(_itens) > 1 and _uso["bytes"] > limite:
+        _remover(next(iter(_itens)))
+        _contadores["despejos"] += 1
+
+def _obter(chave, calcular):
+    with _trava:
+        if chave in _itens:
+            _itens.move_to_end(chave)
+            _contadores["acertos"] += 1
+            return _entregar(_itens[chave][0])
+        carregando = _carregando.setdefault(chave, threading.Lock())
+    with carregando:
+        with _trava:
+            if chave in _itens:  # outra sessão calculou enquanto esta esperava
+                _itens.move_to_end(chave)
+                _contadores["acertos"] += 1
+                return _entregar(_itens[chave][0])
+            _contadores["faltas"] += 1
+        try:
+            valor = _congelar(calcular())
+            with _trava:
+                _inserir(chave, valor)
+        finally:
+            with _trava:
+                _carregando.pop(chave, None)
+    return _entregar(valor)
+
+def compartilhado(funcao):
+    # Decorador para as funções prepara_*: mesmo papel do st.cache_data, com a chave pelos argumentos
+    # (caminho, impressão digital, parâmetros), mas um resultado só para o processo inteiro
+    nome = f"{funcao.__module__}.{funcao.__qualname__}"
+
+    @wraps(funcao)
+    def envolvida(*args, **kwargs):
+        return _obter((nome, args, tuple(sorted(kwargs.items()))), lambda: funcao(*args, **kwargs))
+
+    return envolvida
+
+def memorizar(espaco, chave, calcular):
+    # Como @compartilhado, para quem tem a própria chave (ex.: (impressão digital, página)) e argumentos
+    # que não servem de chave (DataFrames): `calcular()` roda só se (espaco, chave) não está no cache
+    return _obter((espaco, chave, ()), calcular)
+
+def consultar(espaco, chave):
+    # Valor guardado (conta como uso recente) ou None
+    chave = (espaco, chave, ())
+    with _trava:
+        if chave not in _itens:
+            return None
+        _itens.move_to_end(chave)
+        return _entregar(_itens[chave][0])
+
+def guardar(espaco, chave, valor, manter_ao_descartar=False):
+    # `manter_ao_descartar`: o item é justamente o que serve para refazer o resultado quando o
+    # arquivo muda (ex.: rollup), então descartar_arquivo não o tira; só o LRU
+    chave = (espaco, chave, ())
+    valor = _congelar(valor)
+    with _trava:
+        _inserir(chave, valor)
+        if manter_ao_descartar:
+            _mantidos.add(chave)
+    return _entregar(valor)
+
+def _referencia(valor, alvo):
+    # O argumento aponta para o arquivo? (caminho ou impressão digital (caminho, mtime, tamanho))
+    if isinstance(valor, str):
+        return os.path.abspath(valor) == alvo
+    if isinstance(valor, tuple):
+        return any(_referencia(v, alvo) for v in valor)
+    return False
+
+def descartar_arquivo(caminho):
+    # Tira do cache tudo o que foi calculado a partir de qualquer versão do arquivo (planilha
+    # substituída ou apagada), sem esperar o LRU; os demais datasets continuam onde estão
+    alvo = os.path.abspath(caminho)
+    with _trava:
+        chaves = [chave for chave in _itens if chave not in _mantidos and _referencia(chave[1], alvo)]
+        for chave in chaves:
+            _remover(chave)
+        _contadores["descartes"] += len(chaves)
+    return len(chaves)
+
+def estatisticas_cache():
+    with _trava:
+        por_espaco = {}
+        for (espaco, _, _), (_, b) in _itens.items():
+            por_espaco[espaco] = por_espaco.get(espaco, 0) + b / 2**20
+        return {
+            **_contadores,
+            "itens": len(_itens),
+            "mb": _uso["bytes"] / 2**20,
+            "orcamento_mb": ORCAMENTO_MB,
+            "por_espaco": por_espaco,
+        }
+
+def painel_cache():
+    # Diagnóstico: uso do cache compartilhado entre as sessões
+    with st.expander("Cache compartilhado"):
+        est = estatisticas_cache()
+        total = est["acertos"] + est["faltas"]
+        c1, c2 = st.columns(2)
+        c1.metric("Em uso", f"{est['mb']:.1f} / {est['orcamento_mb']:.0f} MB")
+        c2.metric("Itens", est["itens"])
+        c1.metric("Acertos", f"{est['acertos']:,}", f"{est['acertos'] / total:.0%}" if total else None, delta_color="off")
+        c2.metric("Faltas", f"{est['faltas']:,}")
+        st.caption(f"Despejos (LRU): {est['despejos']:,} · Descartes (arquivo alterado): {est['descartes']:,}")
+        for espaco, mb in sorted(est["por_espaco"].items(), key=lambda item: -item[1]):
+            st.caption(f"{espaco}: {mb:.1f} MB")
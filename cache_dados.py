@@ -0,0 +1,85 @@
+import os
+import hashlib
+import logging
+import pandas as pd
+from openpyxl import load_workbook
+
+# Pasta onde ficam as cópias em Parquet das planilhas já lidas
+PASTA_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache_planilhas")
+
+_log = logging.getLogger(__name__)
+
+def impressao_digital(caminho):
+    # Identifica a versão do arquivo: caminho absoluto + data de modificação + tamanho
+    info = os.stat(caminho)
+    return (os.path.abspath(caminho), info.st_mtime_ns, info.st_size)
+
+def abrir_aba(caminho):
+    # Primeira aba em modo read_only (leitura linha a linha, sem montar a planilha na memória).
+    # Devolve (workbook, aba); quem chama fecha o workbook.
+    wb = load_workbook(caminho, read_only=True, data_only=True)
+    ws = wb.worksheets[0]
+    # Os exports do ERP gravam a dimensão da aba errada (A1:A1)
+    ws.reset_dimensions()
+    return wb, ws
+
+def _prefixo_cache(caminho, sheet_name):
+    chave = f"{os.path.abspath(caminho)}|{sheet_name}"
+    return hashlib.sha1(chave.encode("utf-8")).hexdigest()[:16]
+
+def caminho_cache(caminho, sheet_name=0):
+    _, mtime, tamanho = impressao_digital(caminho)
+    return os.path.join(PASTA_CACHE, f"{_prefixo_cache(caminho, sheet_name)}_{mtime}_{tamanho}.parquet")
+
+def texto_em_colunas_mistas(df):
+    # Colunas object com tipos misturados (ex.: números e textos na mesma coluna do export) viram
+    # texto, que o Parquet aceita; vazios continuam vazios (dtype "str" do pandas 3)
+    mistas = [
+        col for col in df.columns
+        if df[col].dtype == object and df[col].dropna().map(type).nunique() > 1
+    ]
+    if not mistas:
+        return df
+    return df.astype({col: "str" for col in mistas})
+
+def _gravar_parquet(df, arquivo_cache):
+    # Grava em arquivo temporário e renomeia, para outro usuário nunca ler um Parquet pela metade
+    temporario = f"{arquivo_cache}.{os.getpid()}.tmp"
+    try:
+        df.to_parquet(temporario, index=False)
+        os.replace(temporario, arquivo_cache)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+def _gravar_cache(df, caminho, sheet_name, arquivo_cache):
+    # Devolve o DataFrame como foi gravado: assim a primeira leitura e as seguintes (do Parquet)
+    # entregam os mesmos tipos
+    try:
+        os.makedirs(PASTA_CACHE, exist_ok=True)
+        # Remove versões antigas da mesma planilha/aba (arquivo foi alterado)
+        prefixo = _prefixo_cache(caminho, sheet_name) + "_"
+        for nome in os.listdir(PASTA_CACHE):
+            if nome.startswith(prefixo) and os.path.join(PASTA_CACHE, nome) != arquivo_cache:
+                os.remove(os.path.join(PASTA_CACHE, nome))
+        try:
+            _gravar_parquet(df, arquivo_cache)
+        except (TypeError, ValueError):
+            # Erros de conversão do Arrow (ArrowTypeError/ArrowInvalid): colunas de tipos mistos
+            df = texto_em_colunas_mistas(df)
+            _gravar_parquet(df, arquivo_cache)
+    except Exception as e:
+        # Sem pyarrow, sem permissão na pasta etc.: segue sem cache, mas deixa registrado
+        _log.warning("Cache Parquet não gravado para %s (aba %s): %s", caminho, sheet_name, e)
+    return df
+
+def ler_planilha(caminho, sheet_name=0):
+    # Lê a aba da planilha usando o Parquet em cache quando o arquivo não mudou
+    arquivo_cache = caminho_cache(caminho, sheet_name)
+    if os.path.exists(arquivo_cache):
+        try:
+            return pd.read_parquet(arquivo_cache)
+        except Exception:
+            pass  # cache ilegível: lê a planilha de novo
+    df = pd.read_excel(caminho, sheet_name=sheet_name)
+    return _gravar_cache(df, caminho, sheet_name, arquivo_cache)
@@ -1,67 +1,193 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import io
 from datetime import datetime
-from st_aggrid import AgGrid, GridOptionsBuilder
 import unicodedata
+from functools import lru_cache
+from cache_dados import impressao_digital
+from cache_compartilhado import compartilhado
+from esquema import carregar_com_esquema
+from numeros import converter_numero_br
+from formatacao import moeda
+from busca import indice_busca, filtrar_por_busca
+from periodo import ordenar_por_data, fatiar_periodo
+from exportacao import botao_exportacao, chave_filtros
+from grade import mostrar_grade
+from resultados_filtros import resultado_memorizado
+from rollup import montar_cubo
+from conciliacao import conciliar, TOLERANCIA_DIAS
+from mov_cc import prepara_planilha as prepara_movimentacao, medidas_cards, arquivo_movimentacao
 
 def normaliza(texto):
     if pd.isna(texto):
         return ""
     return unicodedata.normalize('NFKD', str(texto)).encode('ASCII', 'ignore').decode().lower()
 
-def extrai_empresa(conta):
-    conta_norm = normaliza(conta)
-    if "pp participacoes" in conta_norm:
-        return "PP PARTICIPAÇÕES"
-    elif "xbrother" in conta_norm:
-        return "XBROTHERS"
-    elif "tempreco" in conta_norm:
-        return "TEMPREÇO"
-    else:
-        return "OUTROS"
+# Trecho da conta bancária (normalizado, sem acento) -> empresa. A primeira regra que casar vale.
+REGRAS_EMPRESA = {
+    "pp participacoes": "PP PARTICIPAÇÕES",
+    "xbrother": "XBROTHERS",
+    "tempreco": "TEMPREÇO",
+}
+EMPRESA_PADRAO = "OUTROS"
+# Filtro "Conciliado": opção -> valores aceitos (texto minúsculo)
+ACEITOS_CONCILIADO = {"Sim": ["sim", "conciliado", "true", "1"], "Não": ["não", "nao", "false", "0", "n"]}
+
+@lru_cache(maxsize=4096)
+def _empresa_da_conta(conta_norm, regras):
+    for trecho, empresa in regras:
+        if trecho in conta_norm:
+            return empresa
+    return EMPRESA_PADRAO
+
+def extrai_empresa(conta, regras=None):
+    regras = REGRAS_EMPRESA if regras is None else regras
+    return _empresa_da_conta(normaliza(conta), tuple(regras.items()))
+
+def classifica_empresas(contas, regras=None):
+    # Classifica cada conta distinta uma única vez e espalha o resultado pelas linhas
+    regras = REGRAS_EMPRESA if regras is None else regras
+    codigos, distintas = pd.factorize(contas)
+    empresas = [extrai_empresa(c, regras) for c in distintas] + [extrai_empresa(None, regras)]
+    categorias = list(dict.fromkeys(list(regras.values()) + [EMPRESA_PADRAO]))
+    return pd.Series(
+        pd.Categorical(np.asarray(empresas, dtype=object)[codigos], categories=categorias),
+        index=contas.index
+    )
+
+@compartilhado
+def prepara_extrato(arquivo_selecionado, digital):
+    # Feito uma vez por versão do arquivo: colunas resolvidas (esquema), coluna EMPRESA,
+    # valor numérico e datas convertidas e ordenadas
+    df, esquema = carregar_com_esquema(arquivo_selecionado)
+    col_conta, col_valor, coluna_data = esquema.get("conta"), esquema.get("valor"), esquema.get("data")
+    if col_conta is not None:
+        df["EMPRESA"] = classifica_empresas(df[col_conta])
+    if col_valor:
+        df[col_valor] = converter_numero_br(df[col_valor])
+    cubo = None
+    if coluna_data:
+        df = ordenar_por_data(df, coluna_data)
+        if col_valor and col_conta is not None:
+            # Cubo diário para os totais: dia × conta × tipo × empresa × conciliado
+            dimensoes = [col_conta, "EMPRESA"] + [esquema[c] for c in ("tipo", "conciliado") if c in esquema]
+            medidas = pd.DataFrame({
+                "receitas": df[col_valor].where(df[col_valor] > 0, 0),
+                "despesas": df[col_valor].where(df[col_valor] < 0, 0),
+            })
+            cubo = montar_cubo((arquivo_selecionado, "conc_bancario"), df, coluna_data, dimensoes, medidas)
+    return df, esquema, cubo
+
+@compartilhado
+def concilia_com_movimentacao(arquivo_extrato, digital_extrato, arquivo_mov, digital_mov, tolerancia):
+    extrato, esquema, _ = prepara_extrato(arquivo_extrato, digital_extrato)
+    mov, esquema_mov, _, _ = prepara_movimentacao(arquivo_mov, digital_mov)
+    medidas = medidas_cards(mov, esquema_mov)
+    mov = mov.assign(_valor=medidas["credito"].fillna(0) - medidas["debito"].fillna(0))
+    resultado = conciliar(
+        extrato, mov, esquema.get("data"), esquema.get("valor"), esquema_mov.get("data"), "_valor",
+        esquema.get("conta"), esquema_mov.get("conta"), tolerancia
+    )
+    return resultado, mov.drop(columns="_valor")
+
+@st.fragment
+def mostrar_conciliacao(arquivo_selecionado, digital, df, df_raw, col_valor, coluna_data):
+    # Casamento do extrato (linhas do filtro atual) com a movimentação de conta corrente.
+    # Fragmento: tolerância e conjunto exibido reexecutam só esta seção.
+    arquivo_mov = arquivo_movimentacao(arquivo_selecionado)
+    if arquivo_mov is None or not col_valor or not coluna_data:
+        st.info("Planilha de movimentação de conta corrente não encontrada na pasta do extrato.")
+        return
+    tolerancia = st.number_input(
+        "Tolerância entre as datas (dias)", min_value=0, max_value=30, value=TOLERANCIA_DIAS, step=1, key="tolerancia_cb"
+    )
+    digital_mov = impressao_digital(arquivo_mov)
+    with st.spinner("Conciliando..."):
+        resultado, mov = concilia_com_movimentacao(arquivo_selecionado, digital, arquivo_mov, digital_mov, int(tolerancia))
+    no_filtro = np.zeros(len(df_raw), dtype=bool)
+    no_filtro[df.index.to_numpy()] = True
+    conciliados = resultado["conciliados"][no_filtro[resultado["conciliados"]["pos_extrato"].to_numpy()]]
+    ambiguos = resultado["ambiguos"][no_filtro[resultado["ambiguos"]["pos_extrato"].to_numpy()]]
+    sem_par = resultado["sem_par_extrato"][no_filtro[resultado["sem_par_extrato"]]]
+
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Conciliados", f"{len(conciliados):,}")
+    c2.metric("Ambíguos", f"{len(ambiguos):,}")
+    c3.metric("Sem par no extrato", f"{len(sem_par):,}")
+    c4.metric("Sem par na movimentação", f"{len(resultado['sem_par_movimento']):,}")
+
+    conjunto = st.selectbox(
+        "Mostrar",
+        ["Conciliados", "Ambíguos", "Sem par no extrato", "Sem par na movimentação"],
+        key="conjunto_conciliacao_cb"
+    )
+    if conjunto == "Conciliados":
+        pares = pd.concat([
+            df_raw.iloc[conciliados["pos_extrato"].to_numpy()].reset_index(drop=True).add_prefix("Extrato: "),
+            mov.iloc[conciliados["pos_movimento"].to_numpy()].reset_index(drop=True).add_prefix("Movimentação: "),
+            conciliados[["dias_diferenca"]].reset_index(drop=True).rename(columns={"dias_diferenca": "Diferença (dias)"}),
+        ], axis=1)
+        st.dataframe(pares, hide_index=True, use_container_width=True)
+    elif conjunto == "Ambíguos":
+        linhas = df_raw.iloc[ambiguos["pos_extrato"].to_numpy()].assign(Candidatos=ambiguos["candidatos"].to_numpy())
+        st.dataframe(linhas, hide_index=True, use_container_width=True)
+    elif conjunto == "Sem par no extrato":
+        if len(sem_par):
+            mostrar_grade(df_raw.iloc[sem_par], df_raw, (digital, "conc_bancario"), "sem_par_cb")
+    elif len(resultado["sem_par_movimento"]):
+        mostrar_grade(mov.iloc[resultado["sem_par_movimento"]], mov, (digital_mov, "mov_cc"), "sem_par_mc")
+
+def filtra_extrato(df, cubo, esquema, digital, empresa_sel, busca_manual, data_ini, data_fim, escolha):
+    # Posições das linhas aceitas pelos filtros da página e o cubo diário com os mesmos filtros
+    # (None quando os totais só se respondem pelas linhas, como na busca por texto)
+    df_raw, coluna_data, col_conciliado = df, esquema.get("data"), esquema.get("conciliado")
+    if empresa_sel != "Todas":
+        df = df[df["EMPRESA"] == empresa_sel]
+        if cubo is not None:
+            cubo = cubo[cubo["EMPRESA"] == empresa_sel]
+    if busca_manual:
+        indice = indice_busca((digital, "conc_bancario"), df_raw)
+        df = filtrar_por_busca(df, indice, busca_manual)
+        cubo = None
+    if coluna_data:
+        df = fatiar_periodo(df, coluna_data, data_ini, data_fim)
+        if cubo is not None:
+            cubo = fatiar_periodo(cubo, coluna_data, data_ini, data_fim)
+    aceitos = ACEITOS_CONCILIADO.get(escolha)
+    if col_conciliado and aceitos:
+        df = df[df[col_conciliado].astype(str).str.lower().isin(aceitos)]
+        if cubo is not None:
+            cubo = cubo[cubo[col_conciliado].astype(str).str.lower().isin(aceitos)] if col_conciliado in cubo.columns else None
+    return df.index.to_numpy(), cubo
 
 def show_conc_bancario(arquivo_selecionado):
     try:
-        df_raw = pd.read_excel(arquivo_selecionado)
+        digital = impressao_digital(arquivo_selecionado)
+        df_raw, esquema, cubo_completo = prepara_extrato(arquivo_selecionado, digital)
+        col_conta, col_valor, coluna_data = esquema.get("conta"), esquema.get("valor"), esquema.get("data")
     except Exception as e:
         st.error(f"Erro ao ler '{arquivo_selecionado}': {e}")
         st.stop()
 
-    df = df_raw.copy()
-
-    # --- ADICIONA COLUNA DE EMPRESA ---
-    col_conta = None
-    for col in df.columns:
-        if normaliza(col) == "conta bancaria":
-            col_conta = col
-            break
+    # --- COLUNA DE EMPRESA (calculada no preparo) ---
     if col_conta is None:
         st.error('Coluna "Conta Bancária" não encontrada.')
         st.stop()
 
-    df["EMPRESA"] = df[col_conta].apply(extrai_empresa)
-
     # FILTRO DE EMPRESA (selectbox com opção "Todas")
-    empresas_unicas = ["Todas", "PP PARTICIPAÇÕES", "XBROTHERS", "TEMPREÇO"]
+    empresas_unicas = ["Todas"] + list(REGRAS_EMPRESA.values())
     empresa_sel = st.selectbox(
         "Filtrar por empresa:",
         empresas_unicas,
         index=0,
         key="empresa_cb"
     )
-    if empresa_sel != "Todas":
-        df = df[df["EMPRESA"] == empresa_sel]
 
     # NOVO: CAMPO DE BUSCA GERAL (manual)
     busca_manual = st.text_input("Filtrar por texto (procura em todas as colunas):", "", key="busca_manual_cb")
-    if busca_manual:
-        df = df[df.apply(lambda row: row.astype(str).str.contains(busca_manual, case=False, na=False), axis=1).any(axis=1)]
 
-    # Datas
-    colunas_data = [col for col in df.columns if "data" in normaliza(col)]
-    coluna_data = colunas_data[0] if colunas_data else None
+    # Datas (coluna já convertida e ordenada no preparo)
+    data_ini = data_fim = None
     if coluna_data:
         st.markdown("<b>Período de busca</b>", unsafe_allow_html=True)
         col1, col2 = st.columns(2)
@@ -69,57 +195,39 @@ def show_conc_bancario(arquivo_selecionado):
             data_ini = st.date_input("Data Inicial", value=datetime.today().replace(day=1), key="data_ini_cb")
         with col2:
             data_fim = st.date_input("Data Final", value=datetime.today(), key="data_fim_cb")
-        data_ini = pd.to_datetime(data_ini)
-        data_fim = pd.to_datetime(data_fim)
-        df[coluna_data] = pd.to_datetime(df[coluna_data], errors="coerce")
-        if data_ini and data_fim:
-            mask = (df[coluna_data] >= data_ini) & (df[coluna_data] <= data_fim)
-            df = df[mask]
-        elif data_fim:
-            df = df[df[coluna_data] <= data_fim]
 
     # FILTRO DE CONCILIADO (mantido)
-    col_conciliado = [col for col in df.columns if "conciliado" in normaliza(col)]
-    col_conciliado = col_conciliado[0] if col_conciliado else None
-    if col_conciliado:
+    escolha = None
+    if esquema.get("conciliado"):
         opcoes = ["Não Especificado", "Sim", "Não"]
         escolha = st.selectbox("Filtrar por Conciliado:", opcoes, key="conciliado_cb")
-        if escolha == "Sim":
-            df = df[df[col_conciliado].astype(str).str.lower().isin(["sim", "conciliado", "true", "1"])]
-        elif escolha == "Não":
-            df = df[df[col_conciliado].astype(str).str.lower().isin(["não", "nao", "false", "0", "n"])]
 
-    # CÁLCULO E EXIBIÇÃO DOS SALDOS (POSITIVO E NEGATIVO)
-    col_valor = None
-    for col in df.columns:
-        if "valor" in normaliza(col):
-            col_valor = col
-            break
+    # Filtros aplicados uma vez por estado; reruns sem mudança de filtro reaproveitam o resultado
+    estado = (empresa_sel, busca_manual, data_ini, data_fim, escolha)
+    posicoes, cubo = resultado_memorizado(
+        (digital, "conc_bancario"), estado, lambda: filtra_extrato(df_raw, cubo_completo, esquema, digital, *estado)
+    )
+    df = df_raw.iloc[posicoes]
 
+    # CÁLCULO E EXIBIÇÃO DOS SALDOS (POSITIVO E NEGATIVO)
     total_receitas = total_despesas = 0
     if col_valor:
-        df[col_valor] = pd.to_numeric(df[col_valor], errors='coerce')
-        total_receitas = df[df[col_valor] > 0][col_valor].sum()
-        total_despesas = df[df[col_valor] < 0][col_valor].sum()
+        if cubo is not None:
+            # Soma das linhas do cubo diário já filtradas (poucas centenas) em vez do extrato
+            total_receitas = cubo["receitas"].sum()
+            total_despesas = cubo["despesas"].sum()
+        else:
+            total_receitas = df[df[col_valor] > 0][col_valor].sum()
+            total_despesas = df[df[col_valor] < 0][col_valor].sum()
 
         c1, c2 = st.columns(2)
         with c1:
-            st.metric("Total de Receitas", f"R$ {total_receitas:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
+            st.metric("Total de Receitas", moeda(total_receitas))
         with c2:
-            st.metric("Total de Despesas", f"R$ {total_despesas:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
-
-    # Exportação
-    st.write("## Exportar resultado para Excel")
-    output = io.BytesIO()
-    nome_arquivo = f"resultado_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name='Resultado')
-    st.download_button(
-        label=f"Baixar resultado filtrado ({nome_arquivo})",
-        data=output.getvalue(),
-        file_name=nome_arquivo,
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
+            st.metric("Total de Despesas", moeda(total_despesas))
+
+    # Exportação (gerada só a pedido); a chave é o mesmo `estado` que filtrou as linhas
+    botao_exportacao(df, "conc_bancario", chave_filtros(digital, *estado))
 
     # CONTAGEM DE REGISTROS (ESTILO PRINT)
     st.markdown(
@@ -130,18 +238,10 @@ def show_conc_bancario(arquivo_selecionado):
 
     # AG-GRID
     if not df.empty:
-        gb = GridOptionsBuilder.from_dataframe(df)
-        gb.configure_default_column(editable=False, groupable=True, resizable=True)
-        gb.configure_side_bar()
-        grid_options = gb.build()
-        AgGrid(
-            df,
-            gridOptions=grid_options,
-            enable_enterprise_modules=False,
-            allow_unsafe_jscode=True,
-            theme="material",
-            height=680,
-            use_container_width=True
-        )
+        mostrar_grade(df, df_raw, (digital, "conc_bancario"), "cb")
     else:
         st.info("Nenhum dado para exibir.")
+
+    # CONCILIAÇÃO COM A MOVIMENTAÇÃO DE CONTA CORRENTE
+    with st.expander("Conciliar com a movimentação de conta corrente"):
+        mostrar_conciliacao(arquivo_selecionado, digital, df, df_raw, col_valor, coluna_data)
@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+from busca import normalizar_texto
+
+# Tolerância padrão (dias) entre a data do extrato e a da movimentação
+TOLERANCIA_DIAS = 3
+# Espaço reservado aos dias na chave composta (código da chave * FATOR_DIAS + dia)
+FATOR_DIAS = 1 << 20
+
+def _chaves(extrato, movimento, contas, valores):
+    # Código comum (conta, valor em centavos) para os dois lados; sem conta de um dos lados, só o valor
+    lados = []
+    for df, (col_conta, col_valor) in zip((extrato, movimento), zip(contas, valores)):
+        centavos = (pd.to_numeric(df[col_valor], errors="coerce") * 100).round()
+        partes = {"centavos": centavos}
+        if all(contas):
+            partes["conta"] = df[col_conta].astype(object)
+        lados.append(pd.DataFrame(partes))
+    juntos = pd.concat(lados, ignore_index=True)
+    validas = juntos.notna().all(axis=1).to_numpy()
+    codigos = np.full(len(juntos), -1, dtype=np.int64)
+    if validas.any():
+        codigos[validas] = juntos[validas].groupby(list(juntos.columns), sort=False).ngroup().to_numpy()
+    return codigos[:len(extrato)], codigos[len(extrato):]
+
+def _dias(datas):
+    datas = pd.to_datetime(datas, errors="coerce")
+    dias = (datas.dt.normalize() - pd.Timestamp("1970-01-01")).dt.days
+    return dias.to_numpy(dtype=float)
+
+def _compostas(codigos, dias):
+    validas = (codigos >= 0) & ~np.isnan(dias)
+    compostas = np.full(len(codigos), -1, dtype=np.int64)
+    compostas[validas] = codigos[validas] * FATOR_DIAS + (dias[validas].astype(np.int64) + FATOR_DIAS // 2)
+    return compostas, validas
+
+def _ocorrencia(valores):
+    # n-ésima ocorrência de cada valor (0, 1, 2...) na ordem das linhas
+    return pd.Series(valores).groupby(valores, sort=False).cumcount().to_numpy()
+
+def conciliar(extrato, movimento, col_data_ext, col_valor_ext, col_data_mov, col_valor_mov,
+              col_conta_ext=None, col_conta_mov=None, tolerancia_dias=TOLERANCIA_DIAS):
+    # Casa lançamentos do extrato com os da movimentação por (conta, valor), aceitando
+    # até `tolerancia_dias` de diferença entre as datas. Tudo por ordenação + busca binária.
+    #   1) mesma chave e mesmo dia: pares 1-1 pela ordem de ocorrência (lançamentos iguais são intercambiáveis)
+    #   2) o que sobrou: janela de ±tolerância na chave composta ordenada; exatamente um candidato
+    #      de cada lado = conciliado, mais de um = ambíguo, nenhum = sem par
+    # Devolve DataFrames com as posições (0..n-1) das linhas em cada lado.
+    cod_ext, cod_mov = _chaves(extrato, movimento, (col_conta_ext, col_conta_mov), (col_valor_ext, col_valor_mov))
+    dias_ext, dias_mov = _dias(extrato[col_data_ext]), _dias(movimento[col_data_mov])
+    comp_ext, val_ext = _compostas(cod_ext, dias_ext)
+    comp_mov, val_mov = _compostas(cod_mov, dias_mov)
+
+    # 1) Mesmo dia: junção por hash em (chave composta, ocorrência)
+    pos_ext, pos_mov = np.flatnonzero(val_ext), np.flatnonzero(val_mov)
+    lado_ext = pd.DataFrame({"k": comp_ext[pos_ext], "n": _ocorrencia(comp_ext[pos_ext]), "pos_extrato": pos_ext})
+    lado_mov = pd.DataFrame({"k": comp_mov[pos_mov], "n": _ocorrencia(comp_mov[pos_mov]), "pos_movimento": pos_mov})
+    exatos = lado_ext.merge(lado_mov, on=["k", "n"])[["pos_extrato", "pos_movimento"]]
+    livre_ext = val_ext.copy()
+    livre_ext[exatos["pos_extrato"].to_numpy()] = False
+    livre_mov = val_mov.copy()
+    livre_mov[exatos["pos_movimento"].to_numpy()] = False
+
+    # 2) Janela de datas sobre o que sobrou
+    resto_mov = np.flatnonzero(livre_mov)
+    ordem = np.argsort(comp_mov[resto_mov], kind="stable")
+    resto_mov = resto_mov[ordem]
+    chaves_mov = comp_mov[resto_mov]
+    resto_ext = np.flatnonzero(livre_ext)
+    alvo = comp_ext[resto_ext]
+    ini = np.searchsorted(chaves_mov, alvo - tolerancia_dias, side="left")
+    fim = np.searchsorted(chaves_mov, alvo + tolerancia_dias, side="right")
+    candidatos = fim - ini
+    # Quantas janelas do extrato cobrem cada movimentação restante
+    cobertura = np.zeros(len(chaves_mov) + 1, dtype=np.int64)
+    np.add.at(cobertura, ini, 1)
+    np.add.at(cobertura, fim, -1)
+    cobertura = np.cumsum(cobertura)[:-1]
+    unico = candidatos == 1
+    unico[unico] = cobertura[ini[unico]] == 1
+    janela = pd.DataFrame({"pos_extrato": resto_ext[unico], "pos_movimento": resto_mov[ini[unico]]})
+
+    conciliados = pd.concat([exatos, janela], ignore_index=True)
+    conciliados["dias_diferenca"] = (
+        dias_mov[conciliados["pos_movimento"].to_numpy()] - dias_ext[conciliados["pos_extrato"].to_numpy()]
+    ).astype(np.int64)
+    ambiguos_ext = resto_ext[(candidatos > 0) & ~unico]
+    coberta = np.zeros(len(movimento), dtype=bool)
+    coberta[resto_mov[cobertura > 0]] = True
+    usada = np.zeros(len(movimento), dtype=bool)
+    usada[conciliados["pos_movimento"].to_numpy()] = True
+    return {
+        "conciliados": conciliados.sort_values("pos_extrato", ignore_index=True),
+        "ambiguos": pd.DataFrame({"pos_extrato": ambiguos_ext, "candidatos": candidatos[(candidatos > 0) & ~unico]}),
+        "sem_par_extrato": np.setdiff1d(np.arange(len(extrato)), np.concatenate([conciliados["pos_extrato"].to_numpy(), ambiguos_ext])),
+        "sem_par_movimento": np.flatnonzero(~usada & ~coberta),
+        "ambiguos_movimento": np.flatnonzero(~usada & coberta),
+    }
+
+# Tipo (normalizado) da movimentação -> papel na transferência
+PAPEIS_TRANSFERENCIA = {
+    "saida de transferencia": "Saída",
+    "entrada de transferencia": "Entrada",
+    "estorno saida de transferencia": "Estorno de saída",
+    "estorno entrada de transferencia": "Estorno de entrada",
+}
+
+def _casar_pernas(posicoes_a, posicoes_b, datas, valores, tolerancia_dias):
+    # Casa duas listas de pernas por valor + janela de datas (sem conta: a transferência muda de conta)
+    lado_a = pd.DataFrame({"data": datas[posicoes_a], "valor": valores[posicoes_a]})
+    lado_b = pd.DataFrame({"data": datas[posicoes_b], "valor": valores[posicoes_b]})
+    resultado = conciliar(lado_a, lado_b, "data", "valor", "data", "valor", tolerancia_dias=tolerancia_dias)
+    pares = resultado["conciliados"]
+    return {
+        "a": posicoes_a[pares["pos_extrato"].to_numpy()],
+        "b": posicoes_b[pares["pos_movimento"].to_numpy()],
+        "dias": pares["dias_diferenca"].to_numpy(),
+        "ambiguos": np.concatenate([
+            posicoes_a[resultado["ambiguos"]["pos_extrato"].to_numpy()],
+            posicoes_b[resultado["ambiguos_movimento"]],
+        ]),
+    }
+
+def parear_transferencias(mov, coluna_data, coluna_tipo, valores, tolerancia_dias=TOLERANCIA_DIAS):
+    # Pareia as pernas das transferências da movimentação de conta corrente:
+    # primeiro cada estorno com a perna que ele desfaz, depois as saídas com as entradas que sobraram.
+    # `valores` = valor absoluto de cada linha. Devolve, para cada perna, o papel, a situação
+    # (Pareada, Estornada, Ambígua, Órfã), a posição da perna par (-1 se não houver) e a diferença em dias.
+    papeis = normalizar_texto(mov[coluna_tipo].astype(str)).str.strip().map(PAPEIS_TRANSFERENCIA)
+    papeis = papeis.to_numpy(dtype=object)
+    datas = mov[coluna_data].to_numpy()
+    valores = np.abs(pd.to_numeric(valores, errors="coerce").to_numpy(dtype=float))
+    pernas = {papel: np.flatnonzero(papeis == papel) for papel in PAPEIS_TRANSFERENCIA.values()}
+
+    n = len(mov)
+    situacao = np.full(n, "Órfã", dtype=object)
+    par = np.full(n, -1, dtype=np.int64)
+    dias = np.zeros(n, dtype=np.int64)
+
+    def marcar(casamento, situacao_a, situacao_b):
+        situacao[casamento["ambiguos"]] = "Ambígua"
+        situacao[casamento["a"]], situacao[casamento["b"]] = situacao_a, situacao_b
+        par[casamento["a"]], par[casamento["b"]] = casamento["b"], casamento["a"]
+        dias[casamento["a"]], dias[casamento["b"]] = casamento["dias"], -casamento["dias"]
+
+    restantes = {}
+    for estorno, original in [("Estorno de saída", "Saída"), ("Estorno de entrada", "Entrada")]:
+        casamento = _casar_pernas(pernas[estorno], pernas[original], datas, valores, tolerancia_dias)
+        marcar(casamento, "Pareada", "Estornada")
+        restantes[original] = np.setdiff1d(pernas[original], casamento["b"])
+    marcar(_casar_pernas(restantes["Saída"], restantes["Entrada"], datas, valores, tolerancia_dias), "Pareada", "Pareada")
+
+    posicoes = np.flatnonzero(pd.notna(papeis))
+    return pd.DataFrame({
+        "posicao": posicoes,
+        "Papel": papeis[posicoes],
+        "Situação": situacao[posicoes],
+        "Par": par[posicoes],
+        "Diferença (dias)": dias[posicoes],
+    })
@@ -1,22 +1,77 @@
 import streamlit as st
-import pandas as pd
 import os
 from datetime import datetime
+from cache_dados import impressao_digital
+from cache_compartilhado import compartilhado
+from esquema import carregar_com_esquema, resolver_campos
+from ingestao_stream import cabecalho_planilha, resumir_em_blocos, filtrar_em_blocos
+from periodo import ordenar_por_data, extremos_periodo
+from filtros import especificacao_filtros, aplicar_filtros
+from facetas import construir_facetas, opcoes_faceta, rotulo_faceta
+
+@compartilhado
+def prepara_planilha(caminho, digital):
+    # Feito uma vez por versão do arquivo: colunas resolvidas (esquema), data convertida e ordenada,
+    # e facetas (valores distintos e contagens) de Status, Caixa e Un. Negócio
+    df, esquema = carregar_com_esquema(caminho)
+    if esquema.get("data"):
+        df = ordenar_por_data(df, esquema["data"])
+    facetas = construir_facetas(df, [esquema.get(c) for c in ("status", "caixa", "un_negocio")])
+    return df, esquema, facetas
+
+def _multiselect_faceta(coluna_layout, rotulo, facetas, col, chave):
+    # Opções vêm do índice de facetas montado na carga, com a contagem de linhas de cada valor
+    if col not in facetas:
+        return coluna_layout.multiselect(rotulo, [], key=chave)
+    return coluna_layout.multiselect(rotulo, opcoes_faceta(facetas, col), format_func=rotulo_faceta(facetas, col), key=chave)
+
+def filtros_caixa(df, esquema, facetas, nome_form, chaves):
+    # Formulário Status / Caixa / Un. Negócio / Período; devolve a especificação dos filtros
+    chave_status, chave_caixa, chave_un, chave_data = chaves
+    status_col, caixa_col, un_col, data_col = (esquema.get(c) for c in ("status", "caixa", "un_negocio", "data"))
+
+    with st.form(nome_form):
+        cols1 = st.columns(3)
+        status_selecionado = _multiselect_faceta(cols1[0], "Status", facetas, status_col, chave_status)
+        caixa_selecionado = _multiselect_faceta(cols1[1], "Caixa", facetas, caixa_col, chave_caixa)
+        un_selecionado = _multiselect_faceta(cols1[2], "Un. Negócio", facetas, un_col, chave_un)
+        data_min, data_max = extremos_periodo(df, data_col) if data_col else (None, None)
+        data_ini, data_fim = st.date_input(
+            "Período Data e Hora Inicial",
+            value=(data_min, data_max) if data_min and data_max else (None, None),
+            key=chave_data
+        )
+        submitted = st.form_submit_button("Buscar")
+
+    return especificacao_filtros(
+        valores={status_col: status_selecionado, caixa_col: caixa_selecionado, un_col: un_selecionado},
+        periodo=(data_col, data_ini, data_fim) if data_col and data_ini and data_fim else None,
+    )
+
+def planilhas_contas_pagar(pasta_main):
+    # Caminhos das planilhas da página; "principal" é o .xlsx mais recente da pasta (demais abas)
+    arquivos_xlsx = [f for f in os.listdir(pasta_main) if f.lower().endswith(".xlsx")]
+    arquivos_xlsx.sort(key=lambda f: os.path.getmtime(os.path.join(pasta_main, f)), reverse=True)
+    return {
+        "quebra": os.path.join(pasta_main, "caixa", "quebra de caixa", "quebra-de-caixa.xlsx"),
+        "sangria": os.path.join(pasta_main, "caixa", "sangria", "sangria.xlsx"),
+        "debito": os.path.join(pasta_main, "débito crédito", "débito-crédito-e-pix.xlsx"),
+        "principal": os.path.join(pasta_main, arquivos_xlsx[0]) if arquivos_xlsx else None,
+    }
+
+def esquema_debito(caminho):
+    # Planilha de Débito/Crédito/PIX lida em blocos: o esquema sai só do cabeçalho
+    esquema = resolver_campos(cabecalho_planilha(caminho))
+    faceta_cols = [esquema[c] for c in ("status", "caixa", "un_negocio", "modalidade") if esquema.get(c)]
+    return esquema, faceta_cols
 
 def show_contas_pagar():
     st.title("Contas a Pagar - KPIs e Gráficos")
 
     base_path = os.path.dirname(os.path.abspath(__file__))
     pasta_main = os.path.join(base_path, "contas_pagar")
-    path_quebra = os.path.join(pasta_main, "caixa", "quebra de caixa", "quebra-de-caixa.xlsx")
-    path_sangria = os.path.join(pasta_main, "caixa", "sangria", "sangria.xlsx")
-
-    # Arquivo principal (demais abas)
-    arquivos_xlsx = [f for f in os.listdir(pasta_main) if f.lower().endswith(".xlsx")]
-    arquivo_carregado = None
-    if arquivos_xlsx:
-        arquivos_xlsx.sort(key=lambda f: os.path.getmtime(os.path.join(pasta_main, f)), reverse=True)
-        arquivo_carregado = arquivos_xlsx[0]
+    planilhas = planilhas_contas_pagar(pasta_main)
+    path_quebra, path_sangria, path_debito = planilhas["quebra"], planilhas["sangria"], planilhas["debito"]
 
     opcoes_pagamento = [
         {"key": "caixa", "label": "CAIXA", "icon": "💵"},
@@ -161,42 +216,10 @@ def show_contas_pagar():
         if not os.path.exists(path_quebra):
             st.error("Arquivo de Quebra de Caixa não encontrado!")
             return
-        df = pd.read_excel(path_quebra)
-        df.columns = [c.strip() for c in df.columns]
-        colunas_lower = {c.lower(): c for c in df.columns}
-        status_col = colunas_lower.get('status', None)
-        caixa_col = colunas_lower.get('caixa', None)
-        un_col = colunas_lower.get('un. negócio', None)
-        data_col = colunas_lower.get('data e hora inicial', None)
-        quebra_col = colunas_lower.get('quebra de caixa', None)
-
-        with st.form("filtros_quebra_de_caixa"):
-            cols1 = st.columns(3)
-            status_opcoes = sorted(df[status_col].dropna().unique()) if status_col else []
-            status_selecionado = cols1[0].multiselect("Status", status_opcoes, key="status_qc")
-            caixa_opcoes = sorted(df[caixa_col].dropna().unique()) if caixa_col else []
-            caixa_selecionado = cols1[1].multiselect("Caixa", caixa_opcoes, key="caixa_qc")
-            un_opcoes = sorted(df[un_col].dropna().unique()) if un_col else []
-            un_selecionado = cols1[2].multiselect("Un. Negócio", un_opcoes, key="unegocio_qc")
-            data_min = pd.to_datetime(df[data_col], errors="coerce").min() if data_col else None
-            data_max = pd.to_datetime(df[data_col], errors="coerce").max() if data_col else None
-            data_ini, data_fim = st.date_input(
-                "Período Data e Hora Inicial",
-                value=(data_min, data_max) if data_min and data_max else (None, None),
-                key="dt_qc"
-            )
-            submitted = st.form_submit_button("Buscar")
-
-        df_filt = df.copy()
-        if status_col and status_selecionado:
-            df_filt = df_filt[df_filt[status_col].isin(status_selecionado)]
-        if caixa_col and caixa_selecionado:
-            df_filt = df_filt[df_filt[caixa_col].isin(caixa_selecionado)]
-        if un_col and un_selecionado:
-            df_filt = df_filt[df_filt[un_col].isin(un_selecionado)]
-        if data_col and data_ini and data_fim:
-            datas = pd.to_datetime(df_filt[data_col], errors="coerce")
-            df_filt = df_filt[(datas.dt.date >= data_ini) & (datas.dt.date <= data_fim)]
+        df, esquema, facetas = prepara_planilha(path_quebra, impressao_digital(path_quebra))
+        quebra_col = esquema.get("quebra")
+        espec = filtros_caixa(df, esquema, facetas, "filtros_quebra_de_caixa", ("status_qc", "caixa_qc", "unegocio_qc", "dt_qc"))
+        df_filt = aplicar_filtros(df, espec, facetas=facetas)
 
         st.markdown("## Resultado da Quebra de Caixa")
         if quebra_col:
@@ -214,42 +237,10 @@ def show_contas_pagar():
         if not os.path.exists(path_sangria):
             st.error("Arquivo de Sangria não encontrado!")
             return
-        df = pd.read_excel(path_sangria)
-        df.columns = [c.strip() for c in df.columns]
-        colunas_lower = {c.lower(): c for c in df.columns}
-        status_col = colunas_lower.get('status', None)
-        caixa_col = colunas_lower.get('caixa', None)
-        un_col = colunas_lower.get('un. negócio', None)
-        data_col = colunas_lower.get('data e hora inicial', None)
-        valor_col = colunas_lower.get('valor', None)
-
-        with st.form("filtros_sangria"):
-            cols1 = st.columns(3)
-            status_opcoes = sorted(df[status_col].dropna().unique()) if status_col else []
-            status_selecionado = cols1[0].multiselect("Status", status_opcoes, key="status_sg")
-            caixa_opcoes = sorted(df[caixa_col].dropna().unique()) if caixa_col else []
-            caixa_selecionado = cols1[1].multiselect("Caixa", caixa_opcoes, key="caixa_sg")
-            un_opcoes = sorted(df[un_col].dropna().unique()) if un_col else []
-            un_selecionado = cols1[2].multiselect("Un. Negócio", un_opcoes, key="unegocio_sg")
-            data_min = pd.to_datetime(df[data_col], errors="coerce").min() if data_col else None
-            data_max = pd.to_datetime(df[data_col], errors="coerce").max() if data_col else None
-            data_ini, data_fim = st.date_input(
-                "Período Data e Hora Inicial",
-                value=(data_min, data_max) if data_min and data_max else (None, None),
-                key="dt_sg"
-            )
-            submitted = st.form_submit_button("Buscar")
-
-        df_filt = df.copy()
-        if status_col and status_selecionado:
-            df_filt = df_filt[df_filt[status_col].isin(status_selecionado)]
-        if caixa_col and caixa_selecionado:
-            df_filt = df_filt[df_filt[caixa_col].isin(caixa_selecionado)]
-        if un_col and un_selecionado:
-            df_filt = df_filt[df_filt[un_col].isin(un_selecionado)]
-        if data_col and data_ini and data_fim:
-            datas = pd.to_datetime(df_filt[data_col], errors="coerce")
-            df_filt = df_filt[(datas.dt.date >= data_ini) & (datas.dt.date <= data_fim)]
+        df, esquema, facetas = prepara_planilha(path_sangria, impressao_digital(path_sangria))
+        valor_col = esquema.get("valor")
+        espec = filtros_caixa(df, esquema, facetas, "filtros_sangria", ("status_sg", "caixa_sg", "unegocio_sg", "dt_sg"))
+        df_filt = aplicar_filtros(df, espec, facetas=facetas)
 
         st.markdown("## Resultado da Sangria")
         if valor_col:
@@ -258,42 +249,68 @@ def show_contas_pagar():
         st.dataframe(df_filt, use_container_width=True)
         return
 
-    # ===== ABA PRINCIPAL - demais filtros padrão (Un. Negócio) =====
-    if arquivo_carregado:
-        df = pd.read_excel(os.path.join(pasta_main, arquivo_carregado))
-        df.columns = [c.strip() for c in df.columns]
-        colunas_lower = {c.lower(): c for c in df.columns}
-        with st.form("filtros_gerais"):
-            col1, col2, col3 = st.columns(3)
-            status_col = colunas_lower.get('status', None)
-            status_opcoes = sorted(df[status_col].dropna().unique()) if status_col else []
-            status_selecionado = col1.multiselect("Status", status_opcoes, key="status_geral")
-            caixa_col = colunas_lower.get('caixa', None)
-            caixa_opcoes = sorted(df[caixa_col].dropna().unique()) if caixa_col else []
-            caixa_selecionado = col2.multiselect("Caixa", caixa_opcoes, key="caixa_geral")
-            un_col = colunas_lower.get('un. negócio', None)
-            un_opcoes = sorted(df[un_col].dropna().unique()) if un_col else []
-            un_selecionado = col3.multiselect("Un. Negócio", un_opcoes, key="un_geral")
-            data_col = colunas_lower.get('data e hora inicial', None)
-            data_min = pd.to_datetime(df[data_col], errors="coerce").min() if data_col else None
-            data_max = pd.to_datetime(df[data_col], errors="coerce").max() if data_col else None
+    # ===== ABA DÉBITO / CRÉDITO / PIX (planilha grande, lida em streaming) =====
+    if tipo_escolhido == "debito_credito_pix":
+        if not os.path.exists(path_debito):
+            st.error("Arquivo de Débito/Crédito/PIX não encontrado!")
+            return
+        esquema, faceta_cols = esquema_debito(path_debito)
+        status_col, caixa_col, un_col, data_col, modalidade_col, valor_col = (
+            esquema.get(c) for c in ("status", "caixa", "un_negocio", "data", "modalidade", "valor")
+        )
+
+        barra = st.progress(0.0, text="Lendo planilha de Débito/Crédito/PIX...")
+        def progresso(lidas, total):
+            barra.progress(min(lidas / total, 1.0) if total else 0.0, text=f"{lidas:,} linhas lidas")
+        resumo = resumir_em_blocos(path_debito, faceta_cols, data_col, progresso)
+        barra.empty()
+
+        with st.form("filtros_debito_credito_pix"):
+            # Mesmos rótulos com contagem das demais abas, pelas facetas do resumo em streaming
+            cols1 = st.columns(3)
+            status_selecionado = _multiselect_faceta(cols1[0], "Status", resumo["facetas"], status_col, "status_dcp")
+            caixa_selecionado = _multiselect_faceta(cols1[1], "Caixa", resumo["facetas"], caixa_col, "caixa_dcp")
+            un_selecionado = _multiselect_faceta(cols1[2], "Un. Negócio", resumo["facetas"], un_col, "unegocio_dcp")
+            data_min, data_max = resumo["data_min"], resumo["data_max"]
             data_ini, data_fim = st.date_input(
-                "Período Data e Hora Inicial",
+                "Período",
                 value=(data_min, data_max) if data_min and data_max else (None, None),
-                key="dt_geral"
+                key="dt_dcp"
             )
             submitted = st.form_submit_button("Buscar")
 
-        df_filt = df.copy()
-        if status_col and status_selecionado:
-            df_filt = df_filt[df_filt[status_col].isin(status_selecionado)]
-        if caixa_col and caixa_selecionado:
-            df_filt = df_filt[df_filt[caixa_col].isin(caixa_selecionado)]
-        if un_col and un_selecionado:
-            df_filt = df_filt[df_filt[un_col].isin(un_selecionado)]
-        if data_col and data_ini and data_fim:
-            datas = pd.to_datetime(df_filt[data_col], errors="coerce")
-            df_filt = df_filt[(datas.dt.date >= data_ini) & (datas.dt.date <= data_fim)]
+        # Subopção escolhida vira filtro de modalidade (ex.: "02-CREDITO", "03-CREDITO PARCELADO")
+        chave_modalidade = {"DÉBITO": "debito", "CRÉDITO": "credito", "PIX": "pix"}.get(subopcao_escolhida)
+        modalidades = [m for m in resumo["distintos"].get(modalidade_col, []) if chave_modalidade in str(m).lower()]
+        if modalidades:
+            rotulo = rotulo_faceta(resumo["facetas"], modalidade_col)
+            st.caption("Modalidade: " + " · ".join(rotulo(m) for m in modalidades))
+        espec = especificacao_filtros(
+            valores={status_col: status_selecionado, caixa_col: caixa_selecionado, un_col: un_selecionado, modalidade_col: modalidades},
+            periodo=(data_col, data_ini, data_fim) if data_col and data_ini and data_fim else None,
+        )
+
+        # Guarda o último resultado: reruns com os mesmos filtros não relêem a planilha
+        estado = (impressao_digital(path_debito), tuple(sorted((c, tuple(v)) for c, v in espec["valores"].items())), espec["periodo"])
+        if st.session_state.get("estado_dcp") != estado:
+            barra = st.progress(0.0, text="Filtrando...")
+            st.session_state.resultado_dcp = filtrar_em_blocos(path_debito, espec, resumo, progresso)
+            st.session_state.estado_dcp = estado
+            barra.empty()
+        df_filt = st.session_state.resultado_dcp
+
+        st.markdown(f"## Resultado - {subopcao_escolhida}")
+        if valor_col:
+            st.write(f"**Total (R$):** {df_filt[valor_col].sum():.2f}")
+        st.dataframe(df_filt, use_container_width=True)
+        return
+
+    # ===== ABA PRINCIPAL - demais filtros padrão (Un. Negócio) =====
+    caminho_principal = planilhas["principal"]
+    if caminho_principal:
+        df, esquema, facetas = prepara_planilha(caminho_principal, impressao_digital(caminho_principal))
+        espec = filtros_caixa(df, esquema, facetas, "filtros_gerais", ("status_geral", "caixa_geral", "un_geral", "dt_geral"))
+        df_filt = aplicar_filtros(df, espec, facetas=facetas)
 
         st.dataframe(df_filt, use_container_width=True)
 
@@ -1,7 +1,67 @@
 import streamlit as st
-import pandas as pd
 import os
 from datetime import datetime
+from cache_dados import impressao_digital
+from cache_compartilhado import compartilhado
+from esquema import carregar_com_esquema
+from numeros import converter_data_br
+from resultados_filtros import resultado_memorizado
+
+@compartilhado
+def prepara_planilha(caminho, digital):
+    # Feito uma vez por versão do arquivo: colunas resolvidas (esquema) e tipos convertidos
+    return carregar_com_esquema(caminho)
+
+def filtra_recebimentos(df, esquema, tipo_escolhido, subopcao_escolhida, data_pagamento, data_vencimento,
+                        data_emissao, bancos_caixas, lojas, categoria_fin):
+    # Posições das linhas aceitas pelos filtros da página
+    # Filtra pelo tipo de recebimento + subopção
+    col_tipo_pag = esquema.get("forma_pagamento")
+    if col_tipo_pag:
+        if tipo_escolhido == "caixa":
+            if subopcao_escolhida == "QUEBRA DE CAIXA":
+                col_quebra = esquema.get("quebra")
+                if col_quebra:
+                    df = df[df[col_quebra].notnull()]
+            elif subopcao_escolhida == "SANGRIA":
+                col_sangria = esquema.get("sangria")
+                if col_sangria:
+                    df = df[df[col_sangria].notnull()]
+            else:
+                df = df[df[col_tipo_pag].astype(str).str.lower().str.contains("caixa|dinheiro")]
+        elif tipo_escolhido == "debito_credito_pix":
+            if subopcao_escolhida:
+                df = df[df[col_tipo_pag].astype(str).str.lower().str.contains(subopcao_escolhida.lower())]
+        elif tipo_escolhido == "boleto":
+            if subopcao_escolhida:
+                df = df[df[col_tipo_pag].astype(str).str.lower().str.contains(subopcao_escolhida.lower())]
+
+    # Filtros adicionais
+    if data_pagamento:
+        col_data_pgto = esquema.get("data_pagamento")
+        if col_data_pgto:
+            df = df[converter_data_br(df[col_data_pgto]).dt.date == data_pagamento]
+    if data_vencimento:
+        col_data_venc = esquema.get("vencimento")
+        if col_data_venc:
+            df = df[converter_data_br(df[col_data_venc]).dt.date == data_vencimento]
+    if data_emissao:
+        col_data_emis = esquema.get("emissao")
+        if col_data_emis:
+            df = df[converter_data_br(df[col_data_emis]).dt.date == data_emissao]
+    if bancos_caixas:
+        col_banco = esquema.get("banco")
+        if col_banco:
+            df = df[df[col_banco].astype(str).str.contains(bancos_caixas, case=False, na=False)]
+    if lojas:
+        col_loja = esquema.get("loja")
+        if col_loja:
+            df = df[df[col_loja].astype(str).str.contains(lojas, case=False, na=False)]
+    if categoria_fin:
+        col_cat = esquema.get("categoria")
+        if col_cat:
+            df = df[df[col_cat].astype(str).str.contains(categoria_fin, case=False, na=False)]
+    return df.index.to_numpy()
 
 def show_contas_receber():
     st.title("Contas a Receber - KPIs e Gráficos")
@@ -170,54 +230,15 @@ def show_contas_receber():
         submitted = st.form_submit_button("Buscar")
 
     if arquivo_carregado:
-        df = pd.read_excel(os.path.join(pasta, arquivo_carregado))
-        df.columns = [c.strip() for c in df.columns]
-        # Filtra pelo tipo de recebimento + subopção
-        col_tipo_pag = next((c for c in df.columns if "pagamento" in c.lower() or "forma" in c.lower()), None)
-        if col_tipo_pag:
-            if tipo_escolhido == "caixa":
-                if subopcao_escolhida == "QUEBRA DE CAIXA":
-                    if any("quebra" in c.lower() for c in df.columns):
-                        col_quebra = next((c for c in df.columns if "quebra" in c.lower()), None)
-                        df = df[df[col_quebra].notnull()]
-                elif subopcao_escolhida == "SANGRIA":
-                    if any("sangria" in c.lower() for c in df.columns):
-                        col_sangria = next((c for c in df.columns if "sangria" in c.lower()), None)
-                        df = df[df[col_sangria].notnull()]
-                else:
-                    df = df[df[col_tipo_pag].astype(str).str.lower().str.contains("caixa|dinheiro")]
-            elif tipo_escolhido == "debito_credito_pix":
-                if subopcao_escolhida:
-                    df = df[df[col_tipo_pag].astype(str).str.lower().str.contains(subopcao_escolhida.lower())]
-            elif tipo_escolhido == "boleto":
-                if subopcao_escolhida:
-                    df = df[df[col_tipo_pag].astype(str).str.lower().str.contains(subopcao_escolhida.lower())]
-
-        # Filtros adicionais
-        if data_pagamento:
-            col_data_pgto = next((c for c in df.columns if "pagamento" in c.lower()), None)
-            if col_data_pgto:
-                df = df[pd.to_datetime(df[col_data_pgto], errors="coerce").dt.date == data_pagamento]
-        if data_vencimento:
-            col_data_venc = next((c for c in df.columns if "venc" in c.lower()), None)
-            if col_data_venc:
-                df = df[pd.to_datetime(df[col_data_venc], errors="coerce").dt.date == data_vencimento]
-        if data_emissao:
-            col_data_emis = next((c for c in df.columns if "emi" in c.lower()), None)
-            if col_data_emis:
-                df = df[pd.to_datetime(df[col_data_emis], errors="coerce").dt.date == data_emissao]
-        if bancos_caixas:
-            col_banco = next((c for c in df.columns if "banco" in c.lower() or "caixa" in c.lower()), None)
-            if col_banco:
-                df = df[df[col_banco].astype(str).str.contains(bancos_caixas, case=False, na=False)]
-        if lojas:
-            col_loja = next((c for c in df.columns if "loja" in c.lower()), None)
-            if col_loja:
-                df = df[df[col_loja].astype(str).str.contains(lojas, case=False, na=False)]
-        if categoria_fin:
-            col_cat = next((c for c in df.columns if "categ" in c.lower()), None)
-            if col_cat:
-                df = df[df[col_cat].astype(str).str.contains(categoria_fin, case=False, na=False)]
+        caminho = os.path.join(pasta, arquivo_carregado)
+        digital = impressao_digital(caminho)
+        df_raw, esquema = prepara_planilha(caminho, digital)
+        # Filtros aplicados uma vez por estado; reruns sem mudança de filtro reaproveitam o resultado
+        estado = (tipo_escolhido, subopcao_escolhida, data_pagamento, data_vencimento, data_emissao, bancos_caixas, lojas, categoria_fin)
+        posicoes = resultado_memorizado(
+            (digital, "contas_receber"), estado, lambda: filtra_recebimentos(df_raw, esquema, *estado)
+        )
+        df = df_raw.iloc[posicoes]
         st.markdown("---")
         if not df.empty:
             st.dataframe(df, use_container_width=True)
@@ -1,20 +1,20 @@
 import streamlit as st
-import pandas as pd
 import os
 import plotly.graph_objs as go
+from kpis import somar_kpis
+from formatacao import moeda
 
-def ler_valor_arquivo(nome_arquivo, pasta_dashboard):
-    caminho = os.path.join(pasta_dashboard, nome_arquivo + ".xlsx")
-    if os.path.exists(caminho):
-        try:
-            df = pd.read_excel(caminho)
-            # Procura a coluna 'valor' (qualquer variação de maiúsculas/minúsculas)
-            col_valor = next((col for col in df.columns if col.strip().lower() == 'valor'), None)
-            if col_valor and not df.empty:
-                return float(df[col_valor].sum())
-        except Exception as e:
-            st.error(f"Erro ao ler {nome_arquivo}: {e}")
-    return 0.0
+def ler_valores_arquivos(nomes_arquivos, pasta_dashboard):
+    # Soma a coluna 'valor' de cada arquivo; os não alterados vêm do cache e os demais são lidos em paralelo
+    caminhos = {nome: os.path.join(pasta_dashboard, nome + ".xlsx") for nome in nomes_arquivos}
+    somas = somar_kpis(list(caminhos.values()))
+    valores = {}
+    for nome, caminho in caminhos.items():
+        valor, erro = somas[caminho]
+        if erro is not None:
+            st.error(f"Erro ao ler {nome}: {erro}")
+        valores[nome] = valor
+    return valores
 
 def show_dashboard():
     st.title("📊 Dashboard Executivo – KPIs Financeiros")
@@ -25,13 +25,17 @@ def show_dashboard():
         st.warning(f"Pasta 'dashboard' não encontrada em: {pasta_dashboard}")
         st.stop()
 
-    # 2. Ler cada arquivo individualmente
-    saldo_pago = ler_valor_arquivo("saldo_pago", pasta_dashboard)
-    saldo_pendente = ler_valor_arquivo("saldo_pendente", pasta_dashboard)
-    saldo_recebido = ler_valor_arquivo("saldo_recebido", pasta_dashboard)
-    saldo_atual = ler_valor_arquivo("saldo_atual", pasta_dashboard)  # se desejar mostrar o arquivo isolado
-    saldo_a_pagar = ler_valor_arquivo("saldo_a_pagar", pasta_dashboard)
-    saldo_a_receber = ler_valor_arquivo("saldo_a_receber", pasta_dashboard)
+    # 2. Ler os arquivos (somente a coluna 'valor' de cada um)
+    valores = ler_valores_arquivos(
+        ["saldo_pago", "saldo_pendente", "saldo_recebido", "saldo_atual", "saldo_a_pagar", "saldo_a_receber"],
+        pasta_dashboard
+    )
+    saldo_pago = valores["saldo_pago"]
+    saldo_pendente = valores["saldo_pendente"]
+    saldo_recebido = valores["saldo_recebido"]
+    saldo_atual = valores["saldo_atual"]  # se desejar mostrar o arquivo isolado
+    saldo_a_pagar = valores["saldo_a_pagar"]
+    saldo_a_receber = valores["saldo_a_receber"]
     
     # === Calcular o Saldo Previsto: Recebido + Pago - Pendente ===
     saldo_previsto = saldo_recebido + saldo_pago - saldo_pendente
@@ -57,7 +61,7 @@ def show_dashboard():
                             margin: 8px 0 12px 0;
                             box-shadow:0 1px 8px #0001;'>
                     <div style='font-size:1.16em;font-weight:bold;letter-spacing:.2px;color:#bbb;'>{kpi["nome"]}</div>
-                    <div style='font-size:2.2em;color:{kpi["cor"]};font-weight:700;margin:7px 0 0 0;'>R$ {kpi["valor"]:,.2f}</div>
+                    <div style='font-size:2.2em;color:{kpi["cor"]};font-weight:700;margin:7px 0 0 0;'>{moeda(kpi["valor"])}</div>
                 </div>
             """, unsafe_allow_html=True)
 
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import unicodedata
+import pandas as pd
+from cache_dados import caminho_cache, ler_planilha
+from numeros import converter_numero_br, converter_data_br
+from memoria import compactar_tipos, bytes_em_memoria, registrar_memoria
+
+# Campo canônico -> (regras, tipo). As regras são tentadas em ordem; cada regra é um trecho do nome
+# normalizado (minúsculo, sem acento), "=nome" para nome exato, ou uma tupla de alternativas.
+# Dentro de uma regra vale a primeira coluna da planilha que casar.
+CAMPOS = {
+    "data": (["=data e hora inicial", "=data hora transacao", "data"], "data"),
+    "valor": (["=valor", "valor"], "numero"),
+    "debito": (["=debito"], "numero"),
+    "credito": (["=credito"], "numero"),
+    "saldo": (["=saldo"], "numero"),
+    "saldo_anterior": (["=saldo anterior"], "numero"),
+    "inclusao": (["inclusao"], "data"),
+    "status": (["=status", "status"], "texto"),
+    "conta": (["=conta bancaria"], "texto"),
+    "caixa": (["=caixa"], "texto"),
+    "un_negocio": (["=un. negocio", "=un. neg.", "=un.negocio"], "texto"),
+    "tipo": (["=tipo"], "texto"),
+    "modalidade": (["modalidade"], "texto"),
+    "conciliado": (["conciliado"], "texto"),
+    "quebra": (["=quebra de caixa", "quebra"], "numero"),
+    "sangria": (["sangria"], "texto"),
+    "forma_pagamento": ([("pagamento", "forma")], "texto"),
+    "data_pagamento": (["pagamento"], "data"),
+    "vencimento": (["venc"], "data"),
+    "emissao": (["emi"], "data"),
+    "banco": ([("banco", "caixa")], "texto"),
+    "loja": (["loja"], "texto"),
+    "categoria": (["categ"], "texto"),
+}
+
+# Planilha de orçamento: "conta" e "tipo" têm outro sentido (conta orçamentária, grupo)
+CAMPOS_ORCAMENTO = {
+    "conta": (["conta"], "texto"),
+    "orcado": ([("orçado", "orcado")], "numero"),
+    "previsto": (["previsto"], "numero"),
+    "realizado": (["realizado"], "numero"),
+    "tipo": ([("tipo", "grupo", "classe")], "texto"),
+}
+
+def normalizar_nome(nome):
+    return unicodedata.normalize("NFKD", str(nome)).encode("ASCII", "ignore").decode().strip().lower()
+
+def _regra_casa(nome, regra):
+    if isinstance(regra, (tuple, list)):
+        return any(_regra_casa(nome, r) for r in regra)
+    if regra.startswith("="):
+        return nome == normalizar_nome(regra[1:])
+    return normalizar_nome(regra) in nome
+
+def resolver_campos(colunas, campos=CAMPOS):
+    # {campo canônico: coluna da planilha} para os campos encontrados
+    nomes = [(normalizar_nome(col), col) for col in colunas]
+    esquema = {}
+    for campo, (regras, _) in campos.items():
+        for regra in regras:
+            coluna = next((col for nome, col in nomes if _regra_casa(nome, regra)), None)
+            if coluna is not None:
+                esquema[campo] = coluna
+                break
+    return esquema
+
+def _coagir(serie, tipo):
+    # Converte só se todos os valores preenchidos converterem (senão a coluna fica como veio)
+    if tipo == "numero" and not pd.api.types.is_numeric_dtype(serie):
+        convertida = converter_numero_br(serie)
+    elif tipo == "data" and not pd.api.types.is_datetime64_any_dtype(serie):
+        if pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_bool_dtype(serie):
+            return serie
+        convertida = converter_data_br(serie)
+    else:
+        return serie
+    if convertida.notna().sum() != serie.notna().sum():
+        return serie
+    return convertida
+
+def coagir_tipos(df, esquema, campos=CAMPOS):
+    for campo, coluna in esquema.items():
+        df[coluna] = _coagir(df[coluna], campos[campo][1])
+    return df
+
+def _arquivo_esquema(caminho, sheet_name, campos):
+    # Fica ao lado do Parquet da mesma versão (e é apagado junto quando a planilha muda)
+    assinatura = hashlib.sha1(json.dumps(campos, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:8]
+    return caminho_cache(caminho, sheet_name)[:-len(".parquet")] + f".esquema-{assinatura}.json"
+
+def _ler_esquema(arquivo, colunas):
+    try:
+        with open(arquivo, encoding="utf-8") as f:
+            salvo = json.load(f)
+        if salvo["colunas"] == colunas:
+            return salvo["esquema"]
+    except Exception:
+        pass
+    return None
+
+def _gravar_esquema(arquivo, colunas, esquema):
+    try:
+        temporario = f"{arquivo}.{os.getpid()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump({"colunas": colunas, "esquema": esquema}, f, ensure_ascii=False)
+        os.replace(temporario, arquivo)
+    except Exception:
+        pass  # sem esquema gravado: é resolvido de novo na próxima carga
+
+def carregar_com_esquema(caminho, campos=CAMPOS, sheet_name=0):
+    # Lê a planilha (via cache Parquet), limpa os nomes de coluna, resolve os campos canônicos
+    # (ou reaproveita o mapeamento gravado para esta versão do arquivo) e converte os tipos.
+    # Texto repetitivo vira `category` e números são reduzidos sem perda (memoria.compactar_tipos).
+    # Devolve (df, esquema) com esquema = {campo: coluna}; as colunas mantêm os nomes da planilha.
+    df = ler_planilha(caminho, sheet_name=sheet_name)
+    df.columns = [str(col).strip() for col in df.columns]
+    colunas = list(df.columns)
+    arquivo = _arquivo_esquema(caminho, sheet_name, campos)
+    esquema = _ler_esquema(arquivo, colunas)
+    if esquema is None:
+        esquema = resolver_campos(colunas, campos)
+        _gravar_esquema(arquivo, colunas, esquema)
+    df = coagir_tipos(df, esquema, campos)
+    antes = bytes_em_memoria(df)
+    df = compactar_tipos(df, preservar=[col for campo, col in esquema.items() if campos[campo][1] == "numero"])
+    registrar_memoria(os.path.basename(caminho), antes, bytes_em_memoria(df), len(df))
+    return df, esquema
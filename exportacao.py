@@ -0,0 +1,64 @@
+import hashlib
+import io
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import streamlit as st
+import xlsxwriter
+from cache_compartilhado import consultar, guardar
+
+MIME_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+def chave_filtros(digital, *estado):
+    # Versão do arquivo (impressão digital) + hash do estado dos filtros. A impressão digital fica
+    # na chave para que cache_compartilhado.descartar_arquivo tire as exportações do arquivo alterado.
+    return digital, hashlib.sha1(repr(estado).encode("utf-8")).hexdigest()
+
+def _coluna_para_excel(serie):
+    # Valores prontos para o xlsxwriter: vazios (NaN/NaT) viram None, datas viram datetime
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        valores = np.array(serie.dt.to_pydatetime(), dtype=object)
+    else:
+        valores = np.array(serie.to_numpy(dtype=object), dtype=object)
+    valores[serie.isna().to_numpy()] = None
+    return valores
+
+def gerar_xlsx(df, nome_aba="Resultado"):
+    # Escrita linha a linha em constant_memory: cada linha vai para o disco assim que é escrita,
+    # então o consumo de memória não cresce com o tamanho do resultado
+    output = io.BytesIO()
+    wb = xlsxwriter.Workbook(output, {
+        "constant_memory": True,
+        "default_date_format": "yyyy-mm-dd hh:mm:ss",
+    })
+    ws = wb.add_worksheet(nome_aba)
+    ws.write_row(0, 0, [str(col) for col in df.columns], wb.add_format({"bold": True, "border": 1}))
+    colunas = [_coluna_para_excel(df[col]) for col in df.columns]
+    for linha, valores in enumerate(zip(*colunas), start=1):
+        ws.write_row(linha, 0, valores)
+    wb.close()
+    return output.getvalue()
+
+@st.fragment
+def botao_exportacao(df, pagina, chave):
+    # Só gera o arquivo quando pedido; o mesmo estado de filtros reaproveita o arquivo já gerado.
+    # Fragmento: o clique em "Gerar" reexecuta só este bloco (cards e grade não são refeitos).
+    st.write("## Exportar resultado para Excel")
+    # Arquivos gerados ficam no cache compartilhado, por página + estado dos filtros
+    chave = (pagina, chave)
+    gerado = consultar("exportacao", chave)
+    if gerado is None:
+        if not st.button(f"Gerar arquivo Excel ({len(df):,} registros)", key=f"gerar_xlsx_{pagina}"):
+            return
+        with st.spinner("Gerando arquivo..."):
+            dados = gerar_xlsx(df)
+        gerado = guardar("exportacao", chave, (f"resultado_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx", dados))
+    nome_arquivo, dados = gerado
+    st.download_button(
+        label=f"Baixar resultado filtrado ({nome_arquivo})",
+        data=dados,
+        file_name=nome_arquivo,
+        mime=MIME_XLSX,
+        on_click="ignore",
+        key=f"baixar_xlsx_{pagina}"
+    )
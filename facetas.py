@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+def construir_facetas(df, colunas):
+    # Para cada coluna categórica: valores distintos ordenados, nº de linhas por valor e o
+    # código (posição do valor) de cada linha; -1 = vazio. Feito uma vez, na carga do dataset.
+    facetas = {}
+    for col in colunas:
+        if not col or col not in df.columns:
+            continue
+        try:
+            codigos, valores = pd.factorize(df[col], sort=True)
+        except TypeError:
+            codigos, valores = pd.factorize(df[col])  # tipos misturados não ordenam
+        valores = list(valores)
+        facetas[col] = {
+            "valores": valores,
+            "posicao": {v: i for i, v in enumerate(valores)},
+            "contagens": np.bincount(codigos[codigos >= 0], minlength=len(valores)),
+            "codigos": codigos,
+        }
+    return facetas
+
+def opcoes_faceta(facetas, col):
+    return facetas[col]["valores"] if col in facetas else []
+
+def rotulo_faceta(facetas, col, contagens=None):
+    # format_func para multiselect: "valor (nº de linhas)"
+    faceta = facetas[col]
+    contagens = faceta["contagens"] if contagens is None else contagens
+    return lambda v: f"{v} ({contagens[faceta['posicao'][v]]:,})" if v in faceta["posicao"] else str(v)
+
+def mascara_faceta(facetas, col, selecionados, inicio=0, fim=None):
+    # Linhas (da faixa [inicio, fim)) cujo valor está entre os selecionados: consulta por código, sem isin
+    faceta = facetas[col]
+    aceitos = np.zeros(len(faceta["valores"]) + 1, dtype=bool)  # última posição = código -1 (vazio)
+    aceitos[[faceta["posicao"][v] for v in selecionados if v in faceta["posicao"]]] = True
+    return aceitos[faceta["codigos"][inicio:fim]]
+
+def mascara_facetas(facetas, selecao):
+    # Interseção das seleções {coluna: valores}; seleção vazia não filtra
+    mascara = None
+    for col, selecionados in selecao.items():
+        if col in facetas and selecionados:
+            m = mascara_faceta(facetas, col, selecionados)
+            mascara = m if mascara is None else mascara & m
+    return mascara
+
+def contagens_na_mascara(facetas, col, mascara):
+    # Nº de linhas por valor só entre as linhas da máscara (opções dependentes de outro filtro)
+    faceta = facetas[col]
+    codigos = faceta["codigos"] if mascara is None else faceta["codigos"][mascara]
+    return np.bincount(codigos[codigos >= 0], minlength=len(faceta["valores"]))
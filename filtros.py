@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+from periodo import limites_periodo
+from facetas import mascara_faceta
+from numeros import converter_data_br
+
+def especificacao_filtros(valores=None, periodo=None):
+    # Descrição declarativa dos filtros:
+    #   valores: {coluna: valores aceitos}  (seleção vazia ou coluna None = sem filtro)
+    #   periodo: (coluna_data, data_ini, data_fim), dias inteiros e inclusivo
+    valores = {col: list(sel) for col, sel in (valores or {}).items() if col and sel is not None and len(sel)}
+    if periodo and (not periodo[0] or (periodo[1] is None and periodo[2] is None)):
+        periodo = None
+    return {"valores": valores, "periodo": periodo}
+
+def filtros_ativos(espec):
+    return bool(espec["valores"]) or espec["periodo"] is not None
+
+def mascara_periodo(datas, data_ini, data_fim):
+    mascara = datas.notna()
+    if data_ini is not None:
+        mascara &= datas >= pd.Timestamp(data_ini).normalize()
+    if data_fim is not None:
+        mascara &= datas < pd.Timestamp(data_fim).normalize() + pd.Timedelta(days=1)
+    return mascara.to_numpy()
+
+def posicoes_filtradas(df, espec, ordenado=True, facetas=None):
+    # Posições das linhas aceitas por todos os filtros, numa única máscara.
+    # Com `ordenado` (dataset ordenado pela coluna do período, ver periodo.ordenar_por_data)
+    # o período vira uma faixa [i, j) por busca binária e os demais filtros só olham essa faixa.
+    # `facetas` (facetas.construir_facetas do mesmo df) troca o isin por consulta de códigos.
+    i, j = 0, len(df)
+    periodo = espec["periodo"]
+    if periodo and ordenado:
+        i, j = limites_periodo(df[periodo[0]].to_numpy(), periodo[1], periodo[2])
+    mascara = np.ones(j - i, dtype=bool)
+    if periodo and not ordenado:
+        mascara &= mascara_periodo(converter_data_br(df[periodo[0]]), periodo[1], periodo[2])
+    for col, valores in espec["valores"].items():
+        if facetas and col in facetas:
+            mascara &= mascara_faceta(facetas, col, valores, i, j)
+        else:
+            mascara &= df[col].iloc[i:j].isin(valores).to_numpy()
+    return i + np.flatnonzero(mascara)
+
+def aplicar_filtros(df, espec, ordenado=True, facetas=None):
+    # Sem filtro ativo devolve o próprio df (sem cópia); senão, uma única seleção de linhas
+    if not filtros_ativos(espec):
+        return df
+    return df.iloc[posicoes_filtradas(df, espec, ordenado, facetas)]
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+# Formatação só na hora de exibir: os DataFrames continuam numéricos (filtros, somas, exportação)
+_TROCA_SEPARADORES = str.maketrans(",.", ".,")
+
+def moeda(valor):
+    # Um valor só (cards/métricas): "R$ 1.234,56"
+    return f"R$ {valor:,.2f}".translate(_TROCA_SEPARADORES)
+
+# Textos dos grupos de 3 dígitos e dos centavos, montados uma vez: formatar vira indexação de arrays
+_GRUPOS = np.array([str(i) for i in range(1000)], dtype=object)
+_GRUPOS_ZEROS = np.array([f"{i:03d}" for i in range(1000)], dtype=object)
+_CENTAVOS = np.array([f"{i:02d}" for i in range(100)], dtype=object)
+
+def _inteiros_com_milhar(inteiros):
+    # Inteiros >= 0 com ponto de milhar, grupo a grupo (3 dígitos) sobre o array inteiro
+    grupos = [inteiros % 1000]
+    resto = inteiros // 1000
+    while resto.any():
+        grupos.append(resto % 1000)
+        resto = resto // 1000
+    texto = _GRUPOS[grupos[-1]]
+    iniciado = grupos[-1] > 0
+    for grupo in reversed(grupos[:-1]):
+        # Depois do primeiro grupo não nulo os seguintes levam zeros à esquerda ("1.005")
+        texto = np.where(iniciado, texto + "." + _GRUPOS_ZEROS[grupo], _GRUPOS[grupo])
+        iniciado = iniciado | (grupo > 0)
+    return texto
+
+def _sinal(numeros, arredondados):
+    return np.where((numeros < 0) & (arredondados > 0), "-", "").astype(object)
+
+def formatar_moeda(valores, prefixo="R$ ", vazio=""):
+    # Série numérica -> "R$ 1.234,56" / "R$ -80,00" (vazio para NaN), sem chamada Python por célula
+    valores = pd.Series(valores)
+    numeros = pd.to_numeric(valores, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    vazios = np.isnan(numeros)
+    numeros = np.where(vazios, 0, numeros)
+    centavos = np.round(np.abs(numeros) * 100).astype(np.int64)
+    inteiros, fracao = np.divmod(centavos, 100)
+    texto = prefixo + _sinal(numeros, centavos) + _inteiros_com_milhar(inteiros) + "," + _CENTAVOS[fracao]
+    return pd.Series(np.where(vazios, vazio, texto), index=valores.index, dtype=object)
+
+def formatar_percentual(valores, casas=0, vazio="-"):
+    # Razão -> percentual ("0.95" -> "95%", com `casas` decimais separadas por vírgula)
+    valores = pd.Series(valores)
+    numeros = pd.to_numeric(valores, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    vazios = np.isnan(numeros)
+    numeros = np.where(vazios, 0, numeros)
+    escala = 10 ** casas
+    unidades = np.round(np.abs(numeros) * 100 * escala).astype(np.int64)
+    inteiros, fracao = np.divmod(unidades, escala)
+    texto = _sinal(numeros, unidades) + inteiros.astype(str).astype(object)
+    if casas:
+        texto = texto + "," + np.array([f"{i:0{casas}d}" for i in range(escala)], dtype=object)[fracao]
+    return pd.Series(np.where(vazios, vazio, texto + "%"), index=valores.index, dtype=object)
+
+def tabela_formatada(df, moedas=(), percentuais=()):
+    # Cópia para exibição com as colunas de moeda e percentual já em texto
+    exibicao = df.copy()
+    for col in moedas:
+        exibicao[col] = formatar_moeda(df[col])
+    for col in percentuais:
+        exibicao[col] = formatar_percentual(df[col])
+    return exibicao
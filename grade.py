@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+from st_aggrid import AgGrid, GridOptionsBuilder
+from busca import normalizar_texto
+from cache_compartilhado import memorizar
+
+OPCOES_TAMANHO_PAGINA = [100, 200, 500, 1000]
+SEM_ORDENACAO = "(ordem do arquivo)"
+SEM_AGRUPAMENTO = "(sem agrupamento)"
+NENHUM_GRUPO = "(nenhum)"
+ROTULO_VAZIO = "(vazio)"
+# Colunas (nome normalizado) oferecidas para agrupar e, nos grupos, colunas somadas
+COLUNAS_AGRUPAMENTO = ["empresa", "tipo", "status", "conta bancaria", "conta origem", "conta destino"]
+TRECHOS_SOMA = ["valor", "debito", "credito"]
+
+def _ordem_coluna(chave, base, coluna, crescente):
+    # Posições de `base` ordenadas pela coluna (vazios no fim); calculada uma vez por
+    # (dataset, coluna, sentido) e guardada no cache compartilhado
+    def ordenar():
+        serie = base[coluna].reset_index(drop=True)
+        try:
+            ordem = serie.sort_values(ascending=crescente, kind="stable", na_position="last").index
+        except TypeError:
+            ordem = serie.astype(str).sort_values(ascending=crescente, kind="stable").index  # tipos misturados
+        return ordem.to_numpy()
+    return memorizar("grade", (chave, coluna, crescente), ordenar)
+
+def posicoes_ordenadas(df, base, chave, coluna, crescente=True):
+    # Linhas de `df` (subconjunto filtrado de `base`, com o RangeIndex de `base`) na ordem pedida:
+    # aproveita a ordem já calculada do dataset completo em vez de ordenar o resultado a cada filtro
+    ordem = _ordem_coluna(chave, base, coluna, crescente)
+    marcadas = np.zeros(len(base), dtype=bool)
+    marcadas[df.index.to_numpy()] = True
+    return ordem[marcadas[ordem]]
+
+def _pagina_atual(chave_widget, n_paginas):
+    # Mantém a página dentro do intervalo quando os filtros diminuem o resultado
+    pagina = min(max(int(st.session_state.get(chave_widget, 1)), 1), n_paginas)
+    st.session_state[chave_widget] = pagina
+    return pagina
+
+def _grade_paginada(df, base, chave, prefixo, altura):
+    c1, c2, c3, c4 = st.columns([3, 2, 2, 2])
+    with c1:
+        coluna = st.selectbox("Ordenar por", [SEM_ORDENACAO] + list(df.columns), key=f"ordem_{prefixo}")
+    with c2:
+        sentido = st.selectbox("Sentido", ["Crescente", "Decrescente"], key=f"sentido_{prefixo}")
+    with c3:
+        tamanho = st.selectbox("Linhas por página", OPCOES_TAMANHO_PAGINA, index=1, key=f"tamanho_{prefixo}")
+    n_paginas = max(1, -(-len(df) // tamanho))
+    pagina = _pagina_atual(f"pagina_{prefixo}", n_paginas)
+    with c4:
+        st.number_input(f"Página (de {n_paginas:,})", min_value=1, max_value=n_paginas, step=1, key=f"pagina_{prefixo}")
+
+    ini, fim = (pagina - 1) * tamanho, min(pagina * tamanho, len(df))
+    if coluna == SEM_ORDENACAO:
+        df_pagina = df.iloc[ini:fim]
+    else:
+        posicoes = posicoes_ordenadas(df, base, chave, coluna, sentido == "Crescente")
+        df_pagina = df.loc[posicoes[ini:fim]]
+    st.caption(f"Linhas {ini + 1 if fim else 0:,}–{fim:,} de {len(df):,}")
+
+    gb = GridOptionsBuilder.from_dataframe(df_pagina)
+    # Ordenação e agrupamento feitos no servidor sobre o resultado inteiro; no navegador veriam só a página
+    gb.configure_default_column(editable=False, groupable=False, resizable=True, sortable=False)
+    gb.configure_side_bar()
+    grid_options = gb.build()
+    AgGrid(
+        df_pagina,
+        gridOptions=grid_options,
+        enable_enterprise_modules=False,
+        allow_unsafe_jscode=True,
+        theme="material",
+        height=altura,
+        use_container_width=True
+    )
+
+def _nomes_normalizados(df):
+    return dict(zip(normalizar_texto(pd.Series(list(df.columns), dtype=object)), df.columns))
+
+def colunas_agrupaveis(df):
+    nomes = _nomes_normalizados(df)
+    return [nomes[n] for n in COLUNAS_AGRUPAMENTO if n in nomes]
+
+def colunas_soma(df):
+    return [
+        col for nome, col in _nomes_normalizados(df).items()
+        if any(t in nome for t in TRECHOS_SOMA) and pd.api.types.is_numeric_dtype(df[col])
+        and not pd.api.types.is_bool_dtype(df[col])
+    ]
+
+def agregar_grupos(df, coluna):
+    # Uma linha por valor da coluna: nº de registros e somas das colunas de valor
+    chaves = df[coluna].astype(object).where(df[coluna].notna(), ROTULO_VAZIO)
+    grupos = df.groupby(chaves, sort=True, observed=True)
+    resultado = grupos.size().rename("Registros").to_frame()
+    for col in colunas_soma(df):
+        resultado[col] = grupos[col].sum()
+    return resultado.rename_axis(coluna).reset_index()
+
+def linhas_do_grupo(df, coluna, valor):
+    if valor == ROTULO_VAZIO:
+        return df[df[coluna].isna()]
+    return df[df[coluna].astype(object) == valor]
+
+@st.fragment
+def mostrar_grade(df, base, chave, prefixo, altura=680):
+    # Grade paginada no servidor: só a página visível vai para o AgGrid (e para o navegador).
+    # É um fragmento: ordenar, paginar ou agrupar reexecuta só a grade, não a página inteira.
+    # `base` é o dataset completo em cache; `chave` identifica a versão dele (ex.: impressão digital).
+    # Agrupando, só as linhas de grupo (contagens e somas) são enviadas; as linhas de um grupo
+    # são carregadas apenas quando ele é aberto.
+    agrupaveis = colunas_agrupaveis(df)
+    coluna_grupo = SEM_AGRUPAMENTO
+    if agrupaveis:
+        coluna_grupo = st.selectbox("Agrupar por", [SEM_AGRUPAMENTO] + agrupaveis, key=f"agrupar_{prefixo}")
+    if coluna_grupo != SEM_AGRUPAMENTO:
+        grupos = agregar_grupos(df, coluna_grupo)
+        st.dataframe(grupos, hide_index=True, use_container_width=True)
+        rotulos = dict(zip(grupos[coluna_grupo], grupos["Registros"]))
+        aberto = st.selectbox(
+            "Abrir grupo",
+            [NENHUM_GRUPO] + list(rotulos),
+            format_func=lambda v: v if v == NENHUM_GRUPO else f"{v} ({rotulos[v]:,} registros)",
+            key=f"grupo_{prefixo}_{coluna_grupo}"
+        )
+        if aberto == NENHUM_GRUPO:
+            return
+        df = linhas_do_grupo(df, coluna_grupo, aberto)
+    _grade_paginada(df, base, chave, prefixo, altura)
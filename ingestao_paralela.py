@@ -0,0 +1,80 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import pyarrow as pa
+from cache_dados import ler_planilha, caminho_cache
+
+# Leitura de várias planilhas (ou várias abas de uma) em processos separados: o openpyxl é
+# Python puro e preso ao GIL, então threads não ajudam. Cada processo lê uma aba (gravando o
+# cache Parquet) e devolve o DataFrame como buffer Arrow IPC, que volta ao processo principal
+# sem o custo do pickle coluna a coluna.
+# Nº de processos (variável de ambiente POWEBI_WORKERS; 0 = um por núcleo)
+WORKERS = int(os.environ.get("POWEBI_WORKERS", "0")) or (os.cpu_count() or 1)
+# Abaixo deste total (bytes de planilhas ainda sem cache), subir processos custa mais que ler em série
+LIMITE_SERIAL_BYTES = 512 * 1024
+# Os processos são criados de dentro do servidor do Streamlit, que tem várias threads (pré-carga,
+# vigia de arquivos, sessões). Um fork copiaria travas seguras por outras threads (logging, cache)
+# e o filho poderia travar nelas; forkserver (spawn onde não existe) cria processos limpos.
+CONTEXTO_PROCESSOS = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+def numero_workers(pendentes, max_workers=None):
+    return max(1, min(pendentes, max_workers or WORKERS))
+
+def pool_processos(workers):
+    return ProcessPoolExecutor(max_workers=workers, mp_context=CONTEXTO_PROCESSOS)
+
+def _para_arrow(df):
+    try:
+        tabela = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowException, TypeError, ValueError):
+        return df  # colunas com tipos misturados: volta pelo pickle
+    saida = pa.BufferOutputStream()
+    with pa.ipc.new_stream(saida, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+    return saida.getvalue()
+
+def _de_arrow(resultado):
+    # Buffer Arrow -> DataFrame (None quando o filho só gravou o cache)
+    if isinstance(resultado, pa.Buffer):
+        return pa.ipc.open_stream(resultado).read_all().to_pandas()
+    return resultado
+
+def _ler_no_processo(caminho, aba, devolver):
+    # Executado no processo filho
+    df = ler_planilha(caminho, sheet_name=aba)
+    return _para_arrow(df) if devolver else None
+
+def _pendente(caminho, aba):
+    return not os.path.exists(caminho_cache(caminho, aba))
+
+def ler_planilhas(itens, max_workers=None, devolver=True):
+    # `itens`: caminhos (primeira aba) ou pares (caminho, aba). Devolve {item: DataFrame}.
+    # Planilhas que já têm cache Parquet são lidas aqui mesmo (rápido); as demais vão para o pool,
+    # a não ser que sejam poucas/pequenas demais para compensar subir os processos.
+    # Com devolver=False só garante o cache Parquet (pré-carga) e devolve {}.
+    pares = {item: (item, 0) if isinstance(item, str) else item for item in itens}
+    pendentes = [item for item, (caminho, aba) in pares.items() if _pendente(caminho, aba)]
+    tamanho = sum(os.path.getsize(pares[item][0]) for item in pendentes)
+    workers = numero_workers(len(pendentes), max_workers)
+    lidos = {}
+    if workers > 1 and tamanho >= LIMITE_SERIAL_BYTES:
+        with pool_processos(workers) as executor:
+            futuros = {item: executor.submit(_ler_no_processo, *pares[item], devolver) for item in pendentes}
+            lidos = {item: _de_arrow(futuro.result()) for item, futuro in futuros.items()}
+    if not devolver:
+        for item in pendentes:
+            if item not in lidos:
+                ler_planilha(*pares[item])
+        return {}
+    return {item: lidos[item] if item in lidos else ler_planilha(*par) for item, par in pares.items()}
+
+def ler_abas(caminho, abas=None, max_workers=None):
+    # Várias abas de um mesmo arquivo em paralelo; abas=None lê todas. Devolve {aba: DataFrame}.
+    if abas is None:
+        with pd.ExcelFile(caminho) as arquivo:
+            abas = arquivo.sheet_names
+    lidas = ler_planilhas([(caminho, aba) for aba in abas], max_workers=max_workers)
+    return {aba: lidas[(caminho, aba)] for aba in abas}
@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+from cache_dados import impressao_digital, abrir_aba
+from filtros import posicoes_filtradas, mascara_periodo
+from facetas import mascara_faceta
+from numeros import converter_numero_br, converter_data_br
+from memoria import compactar_tipos
+from cache_compartilhado import memorizar
+
+# Quantidade de linhas por bloco na leitura em streaming
+TAMANHO_BLOCO = 5000
+
+def _nomes_colunas(linha):
+    return [str(c).strip() if c is not None else f"Coluna {i + 1}" for i, c in enumerate(linha)]
+
+def cabecalho_planilha(caminho):
+    wb, ws = abrir_aba(caminho)
+    try:
+        return _nomes_colunas(next(ws.iter_rows(values_only=True), ()))
+    finally:
+        wb.close()
+
+def _montar_bloco(linhas, cabecalho, colunas_data):
+    bloco = pd.DataFrame.from_records(linhas, columns=cabecalho)
+    # Como o pd.read_excel: texto que é todo número (ex.: "02" em Un. Neg., "1.234,56") vira número
+    for col in bloco.columns:
+        if pd.api.types.is_string_dtype(bloco[col]) and col not in colunas_data:
+            convertido = pd.to_numeric(bloco[col], errors="coerce")
+            if convertido.notna().sum() != bloco[col].notna().sum():
+                convertido = converter_numero_br(bloco[col])
+            if convertido.notna().sum() == bloco[col].notna().sum() and convertido.notna().any():
+                bloco[col] = convertido
+    for col in colunas_data:
+        if col in bloco.columns:
+            bloco[col] = converter_data_br(bloco[col])
+    return bloco
+
+def ler_em_blocos(caminho, tamanho_bloco=TAMANHO_BLOCO, colunas_data=(), progresso=None, total_linhas=None):
+    # Gera DataFrames de até `tamanho_bloco` linhas sem carregar a planilha inteira na memória.
+    # `progresso(linhas_lidas, total_linhas)` é chamado a cada bloco (total pode ser None).
+    wb, ws = abrir_aba(caminho)
+    try:
+        linhas = ws.iter_rows(values_only=True)
+        cabecalho = _nomes_colunas(next(linhas, ()))
+        n_colunas = len(cabecalho)
+        lidas = 0
+        pendentes = []
+        for linha in linhas:
+            if not any(v is not None for v in linha):
+                continue
+            if len(linha) != n_colunas:
+                linha = tuple(linha[:n_colunas]) + (None,) * (n_colunas - len(linha))
+            pendentes.append(linha)
+            if len(pendentes) >= tamanho_bloco:
+                lidas += len(pendentes)
+                yield _montar_bloco(pendentes, cabecalho, colunas_data)
+                pendentes = []
+                if progresso:
+                    progresso(lidas, total_linhas)
+        if pendentes or lidas == 0:
+            lidas += len(pendentes)
+            yield _montar_bloco(pendentes, cabecalho, colunas_data)
+        if progresso:
+            progresso(lidas, lidas)
+    finally:
+        wb.close()
+
+def _codigos_do_bloco(serie, posicao):
+    # Códigos (posição em `posicao`, valor -> código, crescendo entre blocos) dos valores do bloco; -1 = vazio
+    codigos, unicos = pd.factorize(serie)
+    globais = np.array([posicao.setdefault(v, len(posicao)) for v in unicos] + [-1], dtype=np.int64)
+    return globais[codigos]
+
+def _faceta(posicao, partes):
+    # Mesmo formato de facetas.construir_facetas: valores em ordem, contagens e código de cada linha
+    valores = list(posicao)
+    try:
+        ordem = sorted(range(len(valores)), key=valores.__getitem__)
+    except TypeError:
+        ordem = list(range(len(valores)))  # tipos misturados não ordenam
+    novo = np.full(len(valores) + 1, -1, dtype=np.int64)  # última posição = vazio
+    novo[ordem] = np.arange(len(valores))
+    codigos = novo[np.concatenate(partes)] if partes else np.array([], dtype=np.int64)
+    codigos = codigos.astype(np.min_scalar_type(-max(len(valores), 1)))
+    valores = [valores[i] for i in ordem]
+    return {
+        "valores": valores,
+        "posicao": {v: i for i, v in enumerate(valores)},
+        "contagens": np.bincount(codigos[codigos >= 0], minlength=len(valores)),
+        "codigos": codigos,
+    }
+
+def resumir_em_blocos(caminho, colunas_faceta=(), coluna_data=None, progresso=None):
+    # Uma passada em streaming (por versão do arquivo, no cache compartilhado) que guarda só as
+    # colunas de filtro: código de cada linha nas colunas de faceta e a data. Dá as opções dos
+    # filtros com contagens e, em filtrar_em_blocos, as posições das linhas aceitas sem reler os
+    # filtros do xlsx. São poucos bytes por linha; as demais colunas não ficam na memória.
+    def resumir():
+        posicoes = {col: {} for col in colunas_faceta}
+        codigos = {col: [] for col in colunas_faceta}
+        datas = []
+        linhas = 0
+        for bloco in ler_em_blocos(caminho, colunas_data=[coluna_data] if coluna_data else [], progresso=progresso):
+            linhas += len(bloco)
+            for col in colunas_faceta:
+                codigos[col].append(_codigos_do_bloco(bloco[col], posicoes[col]))
+            if coluna_data:
+                datas.append(bloco[coluna_data].to_numpy(dtype="datetime64[ns]"))
+        facetas = {col: _faceta(posicoes[col], codigos[col]) for col in colunas_faceta}
+        datas = np.concatenate(datas) if datas else None
+        validas = datas[~np.isnat(datas)] if datas is not None else np.array([], dtype="datetime64[ns]")
+        return {
+            "linhas": linhas,
+            "distintos": {col: faceta["valores"] for col, faceta in facetas.items()},
+            "facetas": facetas,
+            "coluna_data": coluna_data,
+            "datas": datas,
+            "data_min": pd.Timestamp(validas.min()) if len(validas) else None,
+            "data_max": pd.Timestamp(validas.max()) if len(validas) else None,
+        }
+    return memorizar("resumos_em_blocos", (impressao_digital(caminho), tuple(colunas_faceta), coluna_data), resumir)
+
+def _posicoes_pelo_resumo(resumo, espec):
+    # Posições aceitas, pelas colunas de filtro do resumo; None se o resumo não cobre os filtros
+    periodo = espec["periodo"]
+    if any(col not in resumo["facetas"] for col in espec["valores"]):
+        return None
+    if periodo and (periodo[0] != resumo["coluna_data"] or resumo["datas"] is None):
+        return None
+    mascara = np.ones(resumo["linhas"], dtype=bool)
+    if periodo:
+        mascara &= mascara_periodo(pd.Series(resumo["datas"]), periodo[1], periodo[2])
+    for col, valores in espec["valores"].items():
+        mascara &= mascara_faceta(resumo["facetas"], col, valores)
+    return np.flatnonzero(mascara)
+
+def filtrar_em_blocos(caminho, espec, resumo=None, progresso=None):
+    # Aplica os filtros (ver filtros.especificacao_filtros) bloco a bloco e guarda só as linhas
+    # aceitas. Com o `resumo` do mesmo arquivo (resumir_em_blocos) as posições já são conhecidas:
+    # blocos sem linha aceita não entram e a leitura para depois da última; sem filtro que
+    # aceite alguma linha, o xlsx nem é aberto.
+    colunas_data = [espec["periodo"][0]] if espec["periodo"] else []
+    posicoes = _posicoes_pelo_resumo(resumo, espec) if resumo is not None else None
+    if posicoes is not None and not len(posicoes):
+        return pd.DataFrame(columns=cabecalho_planilha(caminho))
+    total_linhas = resumo["linhas"] if resumo is not None else None
+    partes = []
+    inicio = 0
+    for bloco in ler_em_blocos(caminho, colunas_data=colunas_data, progresso=progresso, total_linhas=total_linhas):
+        fim = inicio + len(bloco)
+        if posicoes is None:
+            partes.append(bloco.iloc[posicoes_filtradas(bloco, espec, ordenado=False)])
+        else:
+            i, j = np.searchsorted(posicoes, [inicio, fim])
+            if j > i:
+                partes.append(bloco.iloc[posicoes[i:j] - inicio])
+            if j == len(posicoes):
+                break
+        inicio = fim
+    tabela = pd.concat(partes, ignore_index=True)
+    return compactar_tipos(tabela, preservar=list(tabela.columns))
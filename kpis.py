@@ -0,0 +1,104 @@
+import os
+import math
+import json
+import hashlib
+from cache_dados import PASTA_CACHE, abrir_aba
+from ingestao_paralela import numero_workers, pool_processos
+
+# Somas já calculadas, por arquivo, com a impressão digital do conteúdo
+ARQUIVO_SOMAS = os.path.join(PASTA_CACHE, "somas_kpis.json")
+
+def hash_conteudo(caminho):
+    h = hashlib.sha1()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+def somar_coluna_valor(caminho):
+    # Lê apenas a coluna 'valor' da primeira aba, em modo read_only (sem montar DataFrame)
+    wb, ws = abrir_aba(caminho)
+    try:
+        cabecalho = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+        idx = next((i for i, c in enumerate(cabecalho) if isinstance(c, str) and c.strip().lower() == "valor"), None)
+        if idx is None:
+            return 0.0
+        valores = (
+            v for (v,) in ws.iter_rows(min_row=2, min_col=idx + 1, max_col=idx + 1, values_only=True)
+            if isinstance(v, (int, float)) and not isinstance(v, bool)
+        )
+        return math.fsum(valores)
+    finally:
+        wb.close()
+
+def _ler_somas():
+    try:
+        with open(ARQUIVO_SOMAS, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _gravar_somas(somas):
+    try:
+        os.makedirs(PASTA_CACHE, exist_ok=True)
+        temporario = f"{ARQUIVO_SOMAS}.{os.getpid()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(somas, f, ensure_ascii=False)
+        os.replace(temporario, ARQUIVO_SOMAS)
+    except OSError:
+        pass
+
+def somar_kpis(caminhos, max_workers=None):
+    # Retorna {caminho: (soma, erro)}. Arquivos inalterados não são abertos; os demais
+    # são lidos em paralelo, então o tempo total é o do arquivo mais lento.
+    somas = _ler_somas()
+    resultado = {}
+    pendentes = {}
+    alterado = False
+    for caminho in caminhos:
+        if not os.path.exists(caminho):
+            resultado[caminho] = (0.0, None)
+            continue
+        chave = os.path.abspath(caminho)
+        info = os.stat(caminho)
+        salvo = somas.get(chave)
+        if salvo and salvo["mtime"] == info.st_mtime_ns and salvo["tamanho"] == info.st_size:
+            resultado[caminho] = (salvo["valor"], None)
+            continue
+        conteudo = hash_conteudo(caminho)
+        if salvo and salvo["hash"] == conteudo:
+            # Só a data mudou (arquivo copiado de novo): aproveita a soma
+            salvo.update(mtime=info.st_mtime_ns, tamanho=info.st_size)
+            alterado = True
+            resultado[caminho] = (salvo["valor"], None)
+            continue
+        pendentes[caminho] = {"mtime": info.st_mtime_ns, "tamanho": info.st_size, "hash": conteudo}
+
+    if pendentes:
+        workers = numero_workers(len(pendentes), max_workers)
+        if workers == 1:
+            calculados = {c: _somar_com_erro(c) for c in pendentes}
+        else:
+            with pool_processos(workers) as executor:
+                futuros = {c: executor.submit(somar_coluna_valor, c) for c in pendentes}
+                calculados = {c: _resultado_com_erro(f) for c, f in futuros.items()}
+        for caminho, (valor, erro) in calculados.items():
+            resultado[caminho] = (valor, erro)
+            if erro is None:
+                somas[os.path.abspath(caminho)] = dict(pendentes[caminho], valor=valor)
+
+    if alterado or pendentes:
+        _gravar_somas(somas)
+    return resultado
+
+def _somar_com_erro(caminho):
+    try:
+        return somar_coluna_valor(caminho), None
+    except Exception as e:
+        return 0.0, e
+
+def _resultado_com_erro(futuro):
+    try:
+        return futuro.result(), None
+    except Exception as e:
+        return 0.0, e
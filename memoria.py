@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Coluna de texto vira `category` quando tem no máximo esta fração de valores distintos
+LIMITE_CATEGORIA = 0.5
+# Memória de cada dataset carregado (antes/depois da compactação), para o painel de diagnóstico
+_relatorios = {}
+
+def _float_sem_perda(serie):
+    valores = serie.to_numpy(dtype=np.float64)
+    with np.errstate(over="ignore"):
+        compactos = valores.astype(np.float32)
+    return np.array_equal(compactos.astype(np.float64), valores, equal_nan=True)
+
+def compactar_tipos(df, preservar=()):
+    # Reduz a memória do dataset sem mudar valores:
+    #   - texto com poucos valores distintos (Status, Caixa, Tipo, Conta...) vira `category`
+    #   - inteiros vão para o menor tipo inteiro que comporta a coluna
+    #   - floats vão para float32 só se todos os valores voltarem idênticos; as colunas de
+    #     `preservar` (valores somados nos totais) ficam em float64 para a soma não perder precisão
+    # Datas já chegam como datetime64 (esquema.coagir_tipos).
+    for col in df.columns:
+        serie = df[col]
+        if pd.api.types.is_bool_dtype(serie) or isinstance(serie.dtype, pd.CategoricalDtype):
+            continue
+        if pd.api.types.is_string_dtype(serie) or serie.dtype == object:
+            if serie.nunique() <= LIMITE_CATEGORIA * max(serie.notna().sum(), 1):
+                df[col] = serie.astype("category")
+        elif pd.api.types.is_integer_dtype(serie):
+            df[col] = pd.to_numeric(serie, downcast="integer")
+        elif pd.api.types.is_float_dtype(serie) and col not in preservar and serie.dtype != np.float32:
+            if _float_sem_perda(serie):
+                df[col] = serie.astype(np.float32)
+    return df
+
+def bytes_em_memoria(df):
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+def registrar_memoria(nome, antes, depois, linhas):
+    _relatorios[nome] = {"Dataset": nome, "Linhas": linhas, "Antes (MB)": antes / 2**20, "Depois (MB)": depois / 2**20}
+
+def painel_memoria():
+    # Diagnóstico: memória de cada dataset carregado neste processo
+    with st.expander("Diagnóstico de memória"):
+        if not _relatorios:
+            st.caption("Nenhum dataset carregado ainda.")
+            return
+        relatorio = pd.DataFrame(list(_relatorios.values()))
+        relatorio["Redução"] = 1 - relatorio["Depois (MB)"] / relatorio["Antes (MB)"]
+        st.dataframe(
+            relatorio,
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "Antes (MB)": st.column_config.NumberColumn(format="%.2f"),
+                "Depois (MB)": st.column_config.NumberColumn(format="%.2f"),
+                "Redução": st.column_config.NumberColumn(format="percent"),
+            },
+        )
@@ -1,29 +1,112 @@
 import streamlit as st
+import os
 import pandas as pd
-import numpy as np
-import io
 from datetime import datetime
-from st_aggrid import AgGrid, GridOptionsBuilder
+from cache_dados import impressao_digital
+from cache_compartilhado import compartilhado
+from esquema import carregar_com_esquema
+from busca import indice_busca, filtrar_por_busca
+from periodo import ordenar_por_data, fatiar_periodo
+from exportacao import botao_exportacao, chave_filtros
+from grade import mostrar_grade
+from resultados_filtros import resultado_memorizado
+from rollup import montar_cubo
+from razao import construir_razao, razao_da_planilha, conferir_razao, saldos_periodo
+from formatacao import moeda
 
 def valor_final_col(df, col):
-    # Pega o último valor não nulo da coluna após o filtro
+    # Pega o último valor não nulo da coluna após o filtro (sem coluna de data não há razão)
     serie = df[col].dropna()
     if len(serie) > 0:
         return serie.iloc[-1]
     return 0
 
+def medidas_cards(df, esquema):
+    # Débito e crédito de cada linha, como somados nos cards
+    col_debito, col_credito, col_valor = esquema.get("debito"), esquema.get("credito"), esquema.get("valor")
+    medidas = pd.DataFrame(index=df.index)
+    for nome, col, sinal in [("debito", col_debito, -1), ("credito", col_credito, 1)]:
+        if col:
+            medidas[nome] = pd.to_numeric(df[col], errors='coerce')
+        elif col_valor:
+            # Só "Valor" com sinal: saídas (negativas) são débito, entradas (positivas) crédito, ambos positivos
+            valor = pd.to_numeric(df[col_valor], errors='coerce') * sinal
+            medidas[nome] = valor.where(valor > 0)
+        else:
+            medidas[nome] = 0.0
+    return medidas
+
+def arquivo_movimentacao(arquivo_vizinho):
+    # Planilha de movimentação de conta corrente mais recente na pasta de outro arquivo (extrato, transferências)
+    pasta = os.path.dirname(arquivo_vizinho) or "."
+    candidatos = [
+        os.path.join(pasta, f) for f in os.listdir(pasta)
+        if f.lower().endswith(".xlsx") and "mov" in f.lower() and not f.startswith("~$")
+    ]
+    return max(candidatos, key=os.path.getmtime) if candidatos else None
+
+@compartilhado
+def prepara_planilha(arquivo_selecionado, digital):
+    # Feito uma vez por versão do arquivo: colunas resolvidas (esquema), datas convertidas e ordenadas,
+    # o cubo diário (dia × tipo × status) dos cards de Débito/Crédito e o razão por conta dos saldos
+    df, esquema = carregar_com_esquema(arquivo_selecionado)
+    coluna_data = esquema.get("data")
+    cubo = razao = None
+    if coluna_data:
+        # No mesmo dia, na ordem de inclusão: é a ordem em que o Saldo de cada linha encadeia com a seguinte
+        df = ordenar_por_data(df, coluna_data, esquema.get("inclusao"))
+        medidas = medidas_cards(df, esquema)
+        dimensoes = [esquema[c] for c in ("tipo", "status") if c in esquema]
+        if dimensoes:
+            cubo = montar_cubo((arquivo_selecionado, "mov_cc"), df, coluna_data, dimensoes, medidas)
+        col_conta, col_saldo, col_saldo_anterior = esquema.get("conta"), esquema.get("saldo"), esquema.get("saldo_anterior")
+        if col_conta:
+            # Razão por conta a partir dos lançamentos; conta que não fecha com o Saldo da planilha
+            # fica com o saldo da própria planilha
+            razao = construir_razao(
+                df, coluna_data, medidas["credito"].fillna(0) - medidas["debito"].fillna(0), col_conta,
+                df[col_saldo_anterior] if col_saldo_anterior else None
+            )
+            divergentes = conferir_razao(razao, df, coluna_data, col_saldo, col_conta) if col_saldo else []
+            if divergentes:
+                da_planilha = razao_da_planilha(df, coluna_data, col_saldo, col_saldo_anterior, col_conta)
+                razao.update({conta: da_planilha[conta] for conta in divergentes})
+        elif col_saldo:
+            # Sem coluna de conta, os lançamentos de todas as contas vêm numa sequência só:
+            # os saldos são os que a planilha traz em cada linha
+            razao = razao_da_planilha(df, coluna_data, col_saldo, col_saldo_anterior)
+    return df, esquema, cubo, razao
+
+def filtra_movimentacao(df, cubo, esquema, digital, col_tipo, tipo_sel, busca_manual, data_ini, data_fim, selected_status):
+    # Posições das linhas aceitas pelos filtros da página e o cubo diário com os mesmos filtros
+    # (None quando os totais só se respondem pelas linhas, como na busca por texto)
+    df_raw, coluna_data, col_status = df, esquema.get("data"), esquema.get("status")
+    if tipo_sel != "Todos":
+        df = df[df[col_tipo] == tipo_sel]
+        cubo = cubo[cubo[col_tipo] == tipo_sel] if cubo is not None and col_tipo in cubo.columns else None
+    if busca_manual:
+        indice = indice_busca((digital, "mov_cc"), df_raw)
+        df = filtrar_por_busca(df, indice, busca_manual)
+        cubo = None
+    if coluna_data:
+        df = fatiar_periodo(df, coluna_data, data_ini, data_fim)
+        if cubo is not None:
+            cubo = fatiar_periodo(cubo, coluna_data, data_ini, data_fim)
+    if col_status and selected_status:
+        df = df[df[col_status].astype(str).str.capitalize().isin(selected_status)]
+        if cubo is not None:
+            cubo = cubo[cubo[col_status].astype(str).str.capitalize().isin(selected_status)]
+    return df.index.to_numpy(), cubo
+
 def show_mov_cc(arquivo_selecionado):
     try:
-        xls = pd.ExcelFile(arquivo_selecionado)
-        sheet_name = xls.sheet_names[0]
-        df_raw = pd.read_excel(xls, sheet_name=sheet_name)
+        digital = impressao_digital(arquivo_selecionado)
+        df_raw, esquema, cubo_completo, razao = prepara_planilha(arquivo_selecionado, digital)
+        coluna_data = esquema.get("data")
     except Exception as e:
         st.error(f"Erro ao ler o Excel: {e}")
         st.stop()
 
-    df_raw.columns = [col.strip() for col in df_raw.columns]
-    df = df_raw.copy()
-
     # Filtro "Tipo" com os nomes exatos
     tipos_exatos = [
         "Entrada de Transferência",
@@ -34,26 +117,17 @@ def show_mov_cc(arquivo_selecionado):
         "Pagamento de Conta",
         "Saída de Transferência"
     ]
-    col_tipo = None
-    for col in df.columns:
-        if col.strip().lower() == "tipo":
-            col_tipo = col
-            break
+    col_tipo = esquema.get("tipo")
     if col_tipo is None:
         st.warning('Coluna "Tipo" não encontrada. Selecione manualmente:')
-        col_tipo = st.selectbox("Coluna para filtro de tipo:", df.columns)
+        col_tipo = st.selectbox("Coluna para filtro de tipo:", df_raw.columns)
     tipo_sel = st.selectbox("Tipo", ["Todos"] + tipos_exatos, index=0)
-    if tipo_sel != "Todos":
-        df = df[df[col_tipo] == tipo_sel]
 
     # Campo de busca manual
     busca_manual = st.text_input("Filtrar por texto (procura em todas as colunas):", "", key="busca_manual_mc")
-    if busca_manual:
-        df = df[df.apply(lambda row: row.astype(str).str.contains(busca_manual, case=False, na=False), axis=1).any(axis=1)]
 
-    # Filtro de data (primeira coluna que contém "data")
-    colunas_data = [col for col in df.columns if "data" in col.lower()]
-    coluna_data = colunas_data[0] if colunas_data else None
+    # Filtro de data (primeira coluna que contém "data", já convertida e ordenada no preparo)
+    data_ini = data_fim = None
     if coluna_data:
         st.markdown("<b>Período de busca</b>", unsafe_allow_html=True)
         col1, col2 = st.columns(2)
@@ -61,79 +135,60 @@ def show_mov_cc(arquivo_selecionado):
             data_ini = st.date_input("Data Inicial", value=datetime.today().replace(day=1))
         with col2:
             data_fim = st.date_input("Data Final", value=datetime.today())
-        data_ini = pd.to_datetime(data_ini)
-        data_fim = pd.to_datetime(data_fim)
-        df[coluna_data] = pd.to_datetime(df[coluna_data], errors="coerce")
-        if data_ini and data_fim:
-            mask = (df[coluna_data] >= data_ini) & (df[coluna_data] <= data_fim)
-            df = df[mask]
-        elif data_fim:
-            df = df[df[coluna_data] <= data_fim]
 
     # Filtro de status (caso exista)
-    col_status = [col for col in df.columns if "status" in col.lower()]
-    col_status = col_status[0] if col_status else None
     status_opcoes = ["Pendente", "Efetuado", "Cancelado", "Estornado"]
-    if col_status:
+    selected_status = []
+    if esquema.get("status"):
         selected_status = st.multiselect(
             "Status",
             status_opcoes,
             default=[]
         )
-        if selected_status:
-            df = df[df[col_status].astype(str).str.capitalize().isin(selected_status)]
 
-    # Cards: Débito, Crédito, Saldo, Saldo Anterior
-    col_debito = next((col for col in df.columns if col.lower() in ["débito", "debito"]), None)
-    col_credito = next((col for col in df.columns if col.lower() in ["crédito", "credito"]), None)
-    col_saldo = next((col for col in df.columns if col.strip().lower() == "saldo"), None)
-    col_saldo_anterior = next((col for col in df.columns if col.strip().lower() == "saldo anterior"), None)
-    col_valor = next((col for col in df.columns if "valor" in col.lower()), None)
+    # Filtros aplicados uma vez por estado; reruns sem mudança de filtro reaproveitam o resultado
+    estado = (col_tipo, tipo_sel, busca_manual, data_ini, data_fim, selected_status)
+    posicoes, cubo = resultado_memorizado(
+        (digital, "mov_cc"), estado, lambda: filtra_movimentacao(df_raw, cubo_completo, esquema, digital, *estado)
+    )
+    df = df_raw.iloc[posicoes]
 
-    debito = credito = saldo = saldo_anterior = 0
+    # Cards: Débito, Crédito, Saldo, Saldo Anterior
+    col_saldo, col_saldo_anterior = esquema.get("saldo"), esquema.get("saldo_anterior")
 
-    if col_debito:
-        debito = pd.to_numeric(df[col_debito], errors='coerce').sum()
-    elif col_valor:
-        debito = pd.to_numeric(df[df[col_valor] > 0][col_valor], errors='coerce').sum()
+    saldo = saldo_anterior = 0
 
-    if col_credito:
-        credito = pd.to_numeric(df[col_credito], errors='coerce').sum()
-    elif col_valor:
-        credito = pd.to_numeric(df[df[col_valor] < 0][col_valor], errors='coerce').sum()
+    # Débito/Crédito pelas linhas do cubo diário já filtradas; com busca por texto, pelas linhas
+    totais = (cubo if cubo is not None else medidas_cards(df, esquema))[["debito", "credito"]].sum()
+    debito, credito = totais["debito"], totais["credito"]
 
-    if col_saldo:
-        saldo = valor_final_col(df, col_saldo)
-    if col_saldo_anterior:
-        saldo_anterior = valor_final_col(df, col_saldo_anterior)
+    if razao is not None:
+        # Saldos da conta no início e no fim do período, pelo razão em ordem de data
+        # (não dependem da ordem das linhas na planilha nem dos demais filtros)
+        saldo_anterior, saldo = saldos_periodo(razao, data_ini, data_fim)
+    else:
+        if col_saldo:
+            saldo = valor_final_col(df, col_saldo)
+        if col_saldo_anterior:
+            saldo_anterior = valor_final_col(df, col_saldo_anterior)
 
     c1, c2, c3, c4 = st.columns(4)
     with c1:
-        st.metric("Débito", f"R$ {debito:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
+        st.metric("Débito", moeda(debito))
     with c2:
-        st.metric("Crédito", f"R$ {credito:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
+        st.metric("Crédito", moeda(credito))
     with c3:
-        st.metric("Saldo", f"R$ {saldo:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
+        st.metric("Saldo", moeda(saldo))
     with c4:
-        st.metric("Saldo Anterior", f"R$ {saldo_anterior:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
+        st.metric("Saldo Anterior", moeda(saldo_anterior))
 
     # Remove a coluna "Conta Bancária" se existir
-    col_conta = next((col for col in df.columns if col.strip().lower() == "conta bancária"), None)
+    col_conta = esquema.get("conta")
     if col_conta and col_conta in df.columns:
         df = df.drop(columns=[col_conta])
 
-    # Exportação
-    st.write("## Exportar resultado para Excel")
-    output = io.BytesIO()
-    nome_arquivo = f"resultado_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name='Resultado')
-    st.download_button(
-        label=f"Baixar resultado filtrado ({nome_arquivo})",
-        data=output.getvalue(),
-        file_name=nome_arquivo,
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
+    # Exportação (gerada só a pedido); a chave é o mesmo `estado` que filtrou as linhas
+    botao_exportacao(df, "mov_cc", chave_filtros(digital, *estado))
 
     # Contagem de registros
     st.markdown(
@@ -144,18 +199,6 @@ def show_mov_cc(arquivo_selecionado):
 
     # AG-GRID
     if not df.empty:
-        gb = GridOptionsBuilder.from_dataframe(df)
-        gb.configure_default_column(editable=False, groupable=True, resizable=True)
-        gb.configure_side_bar()
-        grid_options = gb.build()
-        AgGrid(
-            df,
-            gridOptions=grid_options,
-            enable_enterprise_modules=False,
-            allow_unsafe_jscode=True,
-            theme="material",
-            height=680,
-            use_container_width=True
-        )
+        mostrar_grade(df, df_raw, (digital, "mov_cc"), "mc")
     else:
         st.info("Nenhum dado para exibir.")
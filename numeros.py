@@ -0,0 +1,55 @@
+import pandas as pd
+
+# Número no formato brasileiro, depois de tirar "R$", espaços, sinal e parênteses:
+# milhar com ponto e decimal com vírgula ("1.234,56"), só vírgula ("1234,5") ou inteiro
+_FORMATO_BRL = r"\d{1,3}(?:\.\d{3})+(?:,\d+)?|\d+,\d+|\d+"
+# Datas em texto: dd/mm/aaaa (com ou sem hora) e, por último, ISO (aaaa-mm-dd) dos exports mais novos
+FORMATOS_DATA = ["%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y", "ISO8601"]
+
+def _eh_texto(serie):
+    # Colunas de texto puro são vetorizadas; colunas object podem misturar texto com números/datas do Excel
+    if serie.dtype != object:
+        return serie.notna()
+    return serie.map(lambda v: isinstance(v, str))
+
+def converter_numero_br(serie):
+    # "R$ 1.234,56" -> 1234.56, "(1.234,56)" e "-R$ 10,00" -> negativos, "1234.56" -> 1234.56;
+    # números que já vieram do Excel passam direto. O que não converte vira NaN.
+    if pd.api.types.is_bool_dtype(serie):
+        return serie
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.astype("float64")
+    texto = _eh_texto(serie)
+    resultado = pd.to_numeric(serie.where(~texto), errors="coerce").astype("float64")
+    if not texto.any():
+        return resultado
+    t = serie[texto].astype(str).str.strip()
+    parenteses = t.str.startswith("(") & t.str.endswith(")")
+    t = t.str.replace(r"[()\s]|R\$", "", regex=True)
+    negativo = parenteses | t.str.startswith("-")
+    t = t.str.lstrip("-")
+    brl = t.str.fullmatch(_FORMATO_BRL)
+    valores = pd.to_numeric(
+        t.where(brl).str.replace(".", "", regex=False).str.replace(",", ".", regex=False), errors="coerce"
+    )
+    valores = valores.fillna(pd.to_numeric(t.where(~brl), errors="coerce")).astype("float64")  # ex.: "1234.56"
+    resultado[texto] = valores.where(~negativo, -valores)
+    return resultado
+
+def converter_data_br(serie):
+    # Texto "dd/mm/aaaa[ hh:mm[:ss]]" (dia primeiro, sem ambiguidade com mm/dd) e datas já vindas do Excel
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    texto = _eh_texto(serie)
+    resultado = pd.to_datetime(serie.where(~texto), errors="coerce")
+    if not texto.any():
+        return resultado
+    t = serie[texto].astype(str).str.strip()
+    datas = pd.Series(pd.NaT, index=t.index, dtype=resultado.dtype)
+    for formato in FORMATOS_DATA:
+        faltam = datas.isna()
+        if not faltam.any():
+            break
+        datas[faltam] = pd.to_datetime(t[faltam], format=formato, errors="coerce")
+    resultado[texto] = datas
+    return resultado
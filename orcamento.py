@@ -1,8 +1,24 @@
 import streamlit as st
-import pandas as pd
 import os
 import numpy as np
 import matplotlib.pyplot as plt
+from cache_dados import impressao_digital
+from cache_compartilhado import compartilhado
+from esquema import carregar_com_esquema, CAMPOS_ORCAMENTO
+from numeros import converter_numero_br
+from formatacao import tabela_formatada
+from facetas import construir_facetas, opcoes_faceta, rotulo_faceta, mascara_facetas, contagens_na_mascara
+
+@compartilhado
+def prepara_orcamento(caminho, digital):
+    # Feito uma vez por versão do arquivo: colunas resolvidas (esquema) e facetas de Conta e Tipo
+    df, esquema = carregar_com_esquema(caminho, CAMPOS_ORCAMENTO)
+    facetas = construir_facetas(df, [esquema.get("conta"), esquema.get("tipo")])
+    return df, esquema, facetas
+
+def arquivo_padrao(arquivos_xlsx):
+    # Arquivo selecionado ao abrir a página: o primeiro com "orc" no nome, senão o primeiro da pasta
+    return next((f for f in arquivos_xlsx if "orc" in f.lower()), arquivos_xlsx[0] if arquivos_xlsx else None)
 
 def show_orcamento():
     st.title("Orçamento Analítico")
@@ -14,33 +30,18 @@ def show_orcamento():
         st.stop()
 
     arquivos_xlsx = [f for f in os.listdir(pasta) if f.lower().endswith(".xlsx")]
-    arq_padrao = None
-    for f in arquivos_xlsx:
-        if "orc" in f.lower():
-            arq_padrao = f
-            break
-
     if not arquivos_xlsx:
         st.warning("Nenhum arquivo XLSX encontrado na pasta 'orcamento'.")
         st.stop()
 
-    arquivo = st.selectbox("Selecione o arquivo XLSX:", arquivos_xlsx, index=arquivos_xlsx.index(arq_padrao) if arq_padrao else 0)
-    df = pd.read_excel(os.path.join(pasta, arquivo))
-    df.columns = [c.strip() for c in df.columns]
-
-    # Função para encontrar nomes de colunas mesmo com variações
-    def encontrar_coluna(candidatos):
-        for nome in df.columns:
-            for cand in candidatos:
-                if cand in nome.lower():
-                    return nome
-        return None
-
-    col_conta = encontrar_coluna(['conta'])
-    col_orcado = encontrar_coluna(['orçado', 'orcado'])
-    col_previsto = encontrar_coluna(['previsto'])
-    col_realizado = encontrar_coluna(['realizado'])
-    col_tipo = encontrar_coluna(['tipo', 'grupo', 'classe'])  # se existir
+    arquivo = st.selectbox("Selecione o arquivo XLSX:", arquivos_xlsx, index=arquivos_xlsx.index(arquivo_padrao(arquivos_xlsx)))
+    caminho = os.path.join(pasta, arquivo)
+    df, esquema, facetas = prepara_orcamento(caminho, impressao_digital(caminho))
+    col_conta = esquema.get("conta")
+    col_orcado = esquema.get("orcado")
+    col_previsto = esquema.get("previsto")
+    col_realizado = esquema.get("realizado")
+    col_tipo = esquema.get("tipo")  # se existir
 
     if not (col_conta and col_orcado and col_previsto and col_realizado):
         st.error("Sua planilha precisa ter colunas de Conta, Orçado, Previsto e Realizado (pode ter nomes ou acentos diferentes).")
@@ -50,48 +51,42 @@ def show_orcamento():
     st.subheader("Filtros")
     col1, col2 = st.columns(2)
     with col1:
-        contas = sorted(df[col_conta].dropna().unique())
-        sel_contas = st.multiselect("Conta(s)", contas, default=contas)
-        df = df[df[col_conta].isin(sel_contas)]
+        contas = opcoes_faceta(facetas, col_conta)
+        sel_contas = st.multiselect("Conta(s)", contas, default=contas, format_func=rotulo_faceta(facetas, col_conta))
+        mascara = mascara_facetas(facetas, {col_conta: sel_contas})
+        if mascara is None:
+            mascara = np.zeros(len(df), dtype=bool)  # nenhuma conta selecionada
     with col2:
         if col_tipo:
-            tipos = sorted(df[col_tipo].dropna().unique())
-            sel_tipos = st.multiselect("Tipo", tipos, default=tipos)
-            df = df[df[col_tipo].isin(sel_tipos)]
-
-    # Cálculo AH (Realizado/Orçado) e AV (Despesa/Faturamento)
-    df_num = df.copy()
+            # Só os tipos presentes nas contas selecionadas, com a contagem dentro delas
+            contagens = contagens_na_mascara(facetas, col_tipo, mascara)
+            tipos = [t for t, n in zip(opcoes_faceta(facetas, col_tipo), contagens) if n]
+            sel_tipos = st.multiselect("Tipo", tipos, default=tipos, format_func=rotulo_faceta(facetas, col_tipo, contagens))
+            mascara_tipo = mascara_facetas(facetas, {col_tipo: sel_tipos})
+            mascara = mascara & (mascara_tipo if mascara_tipo is not None else False)
+    df = df[mascara]
+
+    # Cálculo AH (Realizado/Orçado) e AV (Despesa/Faturamento) sobre os valores numéricos
+    # (já convertidos na carga; converter_numero_br só garante float se a coluna veio mista)
     for col in [col_orcado, col_previsto, col_realizado]:
-        df_num[col] = pd.to_numeric(df_num[col], errors='coerce')
+        df[col] = converter_numero_br(df[col])
 
     # AH: Realizado / Orçado (em %)
-    df['AH'] = np.where(df_num[col_orcado] != 0, df_num[col_realizado] / df_num[col_orcado], np.nan)
+    df['AH'] = np.where(df[col_orcado] != 0, df[col_realizado] / df[col_orcado], np.nan)
     # AV: Despesa (linha) / Faturamento
     if any(str(c).strip().lower() == 'faturamento' for c in df[col_conta]):
         try:
-            fat_val = float(df_num[df[col_conta].str.lower() == 'faturamento'][col_orcado].values[0])
+            fat_val = float(df[df[col_conta].str.lower() == 'faturamento'][col_orcado].values[0])
         except Exception:
             fat_val = None
         df['AV'] = np.where(
             df[col_conta].str.lower() != 'faturamento',
-            np.where(fat_val and fat_val != 0, df_num[col_orcado] / fat_val, np.nan),
+            np.where(fat_val and fat_val != 0, df[col_orcado] / fat_val, np.nan),
             np.nan
         )
     else:
         df['AV'] = np.nan
 
-    # Formatação para visualização
-    def format_moeda(val):
-        try:
-            return f"R$ {float(val):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-        except Exception:
-            return val
-
-    for col in [col_orcado, col_previsto, col_realizado]:
-        df[col] = df[col].apply(format_moeda)
-    df['AH'] = df['AH'].apply(lambda x: f"{x:.0%}" if pd.notnull(x) else "-")
-    df['AV'] = df['AV'].apply(lambda x: f"{x:.0%}" if pd.notnull(x) else "-")
-
     # Mostra a tabela
     st.markdown("""
     <style>
@@ -100,14 +95,18 @@ def show_orcamento():
     .orc-table {background: #fff; border-radius: 8px;}
     </style>
     """, unsafe_allow_html=True)
-    st.dataframe(df, use_container_width=True, hide_index=True)
+    # Formatação só na exibição (R$ e %); df continua numérico para o gráfico
+    st.dataframe(
+        tabela_formatada(df, moedas=[col_orcado, col_previsto, col_realizado], percentuais=['AH', 'AV']),
+        use_container_width=True, hide_index=True
+    )
 
     # Gráfico de barras: Orçado, Previsto, Realizado (apenas contas filtradas)
     st.markdown("### Análise Visual por Conta")
     contas_plot = df[col_conta]
-    orcado_plot = pd.to_numeric(df[col_orcado].str.replace('R\$','').str.replace('.','').str.replace(',','.').str.strip(), errors='coerce')
-    previsto_plot = pd.to_numeric(df[col_previsto].str.replace('R\$','').str.replace('.','').str.replace(',','.').str.strip(), errors='coerce')
-    realizado_plot = pd.to_numeric(df[col_realizado].str.replace('R\$','').str.replace('.','').str.replace(',','.').str.strip(), errors='coerce')
+    orcado_plot = df[col_orcado]
+    previsto_plot = df[col_previsto]
+    realizado_plot = df[col_realizado]
 
     fig, ax = plt.subplots(figsize=(9, 5))
     bar_width = 0.2
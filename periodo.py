@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+from numeros import converter_data_br
+
+def ordenar_por_data(df, coluna, desempate=None):
+    # Converte a coluna de data uma única vez e ordena o dataset por ela (datas vazias no fim);
+    # `desempate` (ex.: data/hora de inclusão) ordena os lançamentos do mesmo dia.
+    # O RangeIndex resultante é a posição da linha no dataset ordenado.
+    df = df.copy()
+    df[coluna] = converter_data_br(df[coluna])
+    colunas = [coluna, desempate] if desempate else coluna
+    return df.sort_values(colunas, kind="stable", na_position="last").reset_index(drop=True)
+
+def _datas(df, coluna):
+    # Visão do array datetime64 da coluna, sem cópia
+    return df[coluna].to_numpy()
+
+def limites_periodo(datas, data_ini=None, data_fim=None):
+    # Posições (i, j) tais que datas[i:j] estão entre data_ini e data_fim (dias inteiros, inclusivo).
+    # `datas` precisa estar ordenado, com NaT no fim (como deixa ordenar_por_data).
+    i = 0
+    j = np.searchsorted(datas, np.datetime64("NaT").astype(datas.dtype), side="left")
+    if data_ini is not None:
+        ini = pd.Timestamp(data_ini).normalize().to_datetime64().astype(datas.dtype)
+        i = np.searchsorted(datas, ini, side="left")
+    if data_fim is not None:
+        fim = (pd.Timestamp(data_fim).normalize() + pd.Timedelta(days=1)).to_datetime64().astype(datas.dtype)
+        j = np.searchsorted(datas, fim, side="left")
+    return int(i), int(max(i, j))
+
+def fatiar_periodo(df, coluna, data_ini=None, data_fim=None):
+    # Filtro de período por busca binária. Funciona também num subconjunto já filtrado
+    # de um dataset ordenado, pois filtrar não altera a ordem das linhas.
+    i, j = limites_periodo(_datas(df, coluna), data_ini, data_fim)
+    return df.iloc[i:j]
+
+def extremos_periodo(df, coluna):
+    # Primeira e última data válidas de um dataset ordenado por `coluna`
+    datas = _datas(df, coluna)
+    n_validas = np.searchsorted(datas, np.datetime64("NaT").astype(datas.dtype), side="left")
+    if n_validas == 0:
+        return None, None
+    return pd.Timestamp(datas[0]), pd.Timestamp(datas[n_validas - 1])
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+from periodo import limites_periodo
+
+# Diferença (R$) tolerada entre o saldo final do razão e o Saldo da planilha
+TOLERANCIA_SALDO = 0.005
+
+def _lancamentos_por_conta(df, coluna_data, coluna_conta):
+    # (conta, posições) dos lançamentos com data de cada conta; sem coluna de conta, uma conta só ("")
+    datas = df[coluna_data].to_numpy()
+    contas = df[coluna_conta] if coluna_conta else pd.Series("", index=df.index)
+    for conta, posicoes in contas.reset_index(drop=True).groupby(contas.to_numpy(), sort=True, dropna=False).indices.items():
+        posicoes = posicoes[~np.isnat(datas[posicoes])]
+        if len(posicoes):
+            yield conta, posicoes
+
+def _abertura(saldo_anterior, posicao):
+    if saldo_anterior is not None and pd.notna(saldo_anterior.iloc[posicao]):
+        return float(saldo_anterior.iloc[posicao])
+    return 0.0
+
+def construir_razao(df, coluna_data, movimento, coluna_conta=None, saldo_anterior=None):
+    # Livro-razão por conta: datas em ordem e saldo acumulado após cada lançamento.
+    # `df` ordenado por `coluna_data` (periodo.ordenar_por_data); `movimento` = crédito - débito por linha;
+    # `saldo_anterior` (opcional) dá o saldo de abertura: o do primeiro lançamento de cada conta.
+    # Lançamentos sem data ficam de fora (não têm lugar no tempo).
+    datas = df[coluna_data].to_numpy()
+    movimento = pd.to_numeric(movimento, errors="coerce").fillna(0).to_numpy(dtype=float)
+    razao = {}
+    for conta, posicoes in _lancamentos_por_conta(df, coluna_data, coluna_conta):
+        abertura = _abertura(saldo_anterior, posicoes[0])
+        razao[conta] = {
+            "datas": datas[posicoes],
+            "abertura": abertura,
+            "acumulado": abertura + np.cumsum(movimento[posicoes]),
+        }
+    return razao
+
+def razao_da_planilha(df, coluna_data, coluna_saldo, coluna_saldo_anterior=None, coluna_conta=None):
+    # Mesmo formato de construir_razao, com o Saldo que a própria planilha traz em cada linha.
+    # `df` em ordem de data e de inclusão (o Saldo de um lançamento é o Saldo Anterior do seguinte);
+    # linha sem Saldo repete o saldo anterior a ela.
+    datas = df[coluna_data].to_numpy()
+    saldos = pd.to_numeric(df[coluna_saldo], errors="coerce").to_numpy(dtype=float)
+    saldo_anterior = df[coluna_saldo_anterior] if coluna_saldo_anterior else None
+    razao = {}
+    for conta, posicoes in _lancamentos_por_conta(df, coluna_data, coluna_conta):
+        abertura = _abertura(saldo_anterior, posicoes[0])
+        razao[conta] = {
+            "datas": datas[posicoes],
+            "abertura": abertura,
+            "acumulado": pd.Series(saldos[posicoes]).ffill().fillna(abertura).to_numpy(),
+        }
+    return razao
+
+def conferir_razao(razao, df, coluna_data, coluna_saldo, coluna_conta=None):
+    # Contas cujo saldo final no razão não fecha com o último Saldo da planilha (em ordem de data)
+    saldos = pd.to_numeric(df[coluna_saldo], errors="coerce").to_numpy(dtype=float)
+    divergentes = []
+    for conta, posicoes in _lancamentos_por_conta(df, coluna_data, coluna_conta):
+        preenchidos = saldos[posicoes][~np.isnan(saldos[posicoes])]
+        if conta in razao and len(preenchidos) and abs(razao[conta]["acumulado"][-1] - preenchidos[-1]) > TOLERANCIA_SALDO:
+            divergentes.append(conta)
+    return divergentes
+
+def saldos_periodo(razao, data_ini=None, data_fim=None, contas=None):
+    # (saldo anterior, saldo final) do período, somados nas contas escolhidas (todas se None):
+    # saldo antes do primeiro lançamento do período e após o último, por busca binária nas datas
+    anterior = final = 0.0
+    for conta, livro in razao.items():
+        if contas is not None and conta not in contas:
+            continue
+        i, j = limites_periodo(livro["datas"], data_ini, data_fim)
+        anterior += livro["acumulado"][i - 1] if i else livro["abertura"]
+        final += livro["acumulado"][j - 1] if j else livro["abertura"]
+    return anterior, final
@@ -0,0 +1,18 @@
+from cache_compartilhado import memorizar
+
+# Camada das páginas sobre o motor de filtros (filtros.py, que não depende do Streamlit):
+# resultados guardados no cache compartilhado, por dataset e estado dos widgets de filtro
+
+def _normalizar_estado(valor):
+    # Seleções múltiplas não dependem da ordem em que foram marcadas
+    if isinstance(valor, (list, set, frozenset)):
+        return tuple(sorted(valor, key=str))
+    return valor
+
+def resultado_memorizado(dataset, estado, calcular):
+    # Reruns com o mesmo estado de filtros (clique na grade, download, widget sem relação, ida e
+    # volta num filtro) reaproveitam o resultado em vez de filtrar de novo.
+    # `calcular()` devolve as posições das linhas aceitas (e o que mais a página precisar, em tupla);
+    # `dataset` identifica a versão dos dados (ex.: impressão digital + página). Os resultados ficam
+    # no cache compartilhado (orçamento e LRU comuns), com as posições somente-leitura.
+    return memorizar("filtros", (dataset, tuple(_normalizar_estado(v) for v in estado)), calcular)
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+from cache_compartilhado import consultar, guardar
+
+COLUNA_REGISTROS = "registros"
+
+def _assinaturas_por_dia(dias, tabela):
+    # Soma (módulo 2^64) dos hashes das linhas de cada dia: muda se qualquer linha do dia mudar
+    codigos, unicos = pd.factorize(dias, use_na_sentinel=False)
+    hashes = pd.util.hash_pandas_object(tabela, index=False).to_numpy()
+    somas = np.zeros(len(unicos), dtype=np.uint64)
+    np.add.at(somas, codigos, hashes)
+    return pd.Series(somas, index=pd.Index(unicos))
+
+def _agregar(tabela, coluna_data, dimensoes, medidas):
+    tabela = tabela.assign(**{COLUNA_REGISTROS: 1})
+    return (
+        tabela.groupby([coluna_data] + dimensoes, dropna=False, observed=True, sort=False)[medidas + [COLUNA_REGISTROS]]
+        .sum()
+        .reset_index()
+    )
+
+def montar_cubo(chave, df, coluna_data, dimensoes, medidas):
+    # Cubo diário: uma linha por dia × combinação das dimensões, com as somas das medidas e o
+    # nº de registros. `medidas` é um DataFrame (mesmo índice de `df`) com as colunas a somar.
+    # O cubo sai ordenado pelo dia (sem data no fim), como os datasets de periodo.ordenar_por_data,
+    # então o período também é filtrado com periodo.fatiar_periodo.
+    tabela = pd.concat([df[coluna_data].dt.normalize(), df[dimensoes], medidas], axis=1)
+    nomes_medidas = list(medidas.columns)
+    assinaturas = _assinaturas_por_dia(tabela[coluna_data], tabela)
+    partes = []
+    # Último cubo montado por dataset (ex.: caminho do arquivo), no cache compartilhado: quando o
+    # arquivo muda, só os dias cujas linhas mudaram são agregados de novo
+    anterior = consultar("rollup", chave)
+    if anterior is not None and anterior["colunas"] == list(tabela.columns):
+        iguais = assinaturas.index[assinaturas.eq(anterior["assinaturas"].reindex(assinaturas.index)).to_numpy()]
+        partes.append(anterior["cubo"][anterior["cubo"][coluna_data].isin(iguais)])
+        tabela = tabela[~tabela[coluna_data].isin(iguais)]
+    partes.append(_agregar(tabela, coluna_data, dimensoes, nomes_medidas))
+    cubo = pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0]
+    cubo = cubo.sort_values(coluna_data, kind="stable", na_position="last").reset_index(drop=True)
+    guardar("rollup", chave, {"colunas": list(tabela.columns), "assinaturas": assinaturas, "cubo": cubo}, manter_ao_descartar=True)
+    return cubo
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+from busca import construir_indice_busca, buscar, filtrar_por_busca, normalizar_texto
+
+def _df():
+    return pd.DataFrame({
+        "Descrição": ["Participações societárias", "PARTICIPACOES", "Tarifa bancária", "Pix recebido", None],
+        "Conta": ["Caixa", "Banco", "Banco", "Caixa", "Banco"],
+        "Valor": [10.0, 20.0, -5.0, 7.5, 1.0],
+    })
+
+def _linhas(df, consulta):
+    return list(np.flatnonzero(buscar(construir_indice_busca(df), consulta)))
+
+def test_normalizar_texto_tira_acentos_e_maiusculas():
+    assert normalizar_texto(pd.Series(["Ação", "ÇÃO", "Ñandu"])).tolist() == ["acao", "cao", "nandu"]
+
+def test_consulta_sem_acento_ignora_acentos_do_texto():
+    assert _linhas(_df(), "participacoes") == [0, 1]
+
+def test_consulta_com_acento_exige_o_acento():
+    assert _linhas(_df(), "Participações") == [0]
+    assert _linhas(_df(), "bancária") == [2]
+
+def test_cedilha_sozinha_nao_vira_c():
+    # "ç" procura "ç" (como o contains antigo), não todas as linhas com "c"
+    df = pd.DataFrame({"Descrição": ["Aplicação", "Conta", "caixa", "ÇAÇA"]})
+    assert _linhas(df, "ç") == [0, 3]
+
+def test_consulta_vazia_ou_espacos_devolve_tudo():
+    assert _linhas(_df(), "") == [0, 1, 2, 3, 4]
+    assert _linhas(_df(), "   ") == [0, 1, 2, 3, 4]
+
+def test_simbolo_que_some_na_normalizacao_nao_devolve_tudo():
+    df = pd.DataFrame({"Descrição": ["Custo €10", "Custo 10"]})
+    assert _linhas(df, "€") == [0]
+
+def test_maiusculas_e_espacos_extras():
+    assert _linhas(_df(), "  PIX   recebido ") == [3]
+
+def test_varios_termos_exigem_a_frase():
+    assert _linhas(_df(), "tarifa bancaria") == [2]
+    assert _linhas(_df(), "bancaria tarifa") == []
+
+def test_frase_nao_atravessa_colunas():
+    assert _linhas(_df(), "recebido caixa") == []
+
+def test_valores_numericos_e_vazios():
+    assert _linhas(_df(), "7.5") == [3]
+    assert _linhas(_df(), "nan") == []
+
+def test_filtrar_por_busca_em_subconjunto():
+    df = _df()
+    indice = construir_indice_busca(df)
+    subconjunto = df.iloc[[1, 2, 3]]
+    assert list(filtrar_por_busca(subconjunto, indice, "banco").index) == [1, 2]
+    assert list(filtrar_por_busca(subconjunto, indice, "participacoes").index) == [1]
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+import cache_compartilhado as cc
+from cache_compartilhado import compartilhado, memorizar, consultar, guardar, descartar_arquivo, estatisticas_cache
+
+@pytest.fixture(autouse=True)
+def cache_vazio(monkeypatch):
+    monkeypatch.setattr(cc, "_itens", type(cc._itens)())
+    monkeypatch.setattr(cc, "_mantidos", set())
+    monkeypatch.setattr(cc, "_uso", {"bytes": 0})
+    monkeypatch.setattr(cc, "_contadores", dict.fromkeys(cc._contadores, 0))
+
+def _mb(n):
+    return np.zeros(n * 2**20, dtype=np.uint8)
+
+def test_calcula_uma_vez_e_conta_acertos():
+    chamadas = []
+
+    @compartilhado
+    def prepara(caminho, escala=1):
+        chamadas.append(caminho)
+        return pd.DataFrame({"x": [1, 2]}) * escala
+
+    assert prepara("a.xlsx", escala=2)["x"].tolist() == [2, 4]
+    prepara("a.xlsx", escala=2)
+    prepara("b.xlsx", escala=2)
+    assert chamadas == ["a.xlsx", "b.xlsx"]
+    est = estatisticas_cache()
+    assert (est["acertos"], est["faltas"], est["itens"]) == (1, 2, 2)
+
+def test_entrega_nao_altera_o_guardado():
+    guardado = memorizar("teste", 1, lambda: (pd.DataFrame({"x": [1, 2]}), np.arange(3)))
+    df, arr = guardado
+    df["x"] = 0
+    with pytest.raises(ValueError):
+        arr[0] = 9
+    assert consultar("teste", 1)[0]["x"].tolist() == [1, 2]
+
+def test_lru_respeita_o_orcamento(monkeypatch):
+    monkeypatch.setattr(cc, "ORCAMENTO_MB", 2.5)
+    guardar("teste", "a", _mb(1))
+    guardar("teste", "b", _mb(1))
+    consultar("teste", "a")  # "a" passa a ser o mais recente
+    guardar("teste", "c", _mb(1))
+    assert consultar("teste", "b") is None
+    assert consultar("teste", "a") is not None and consultar("teste", "c") is not None
+    est = estatisticas_cache()
+    assert est["despejos"] == 1 and est["mb"] == pytest.approx(2.0)
+    guardar("teste", "grande", _mb(5))  # maior que o orçamento: fica sozinho
+    assert estatisticas_cache()["itens"] == 1
+
+def test_descartar_arquivo_tira_todas_as_versoes(tmp_path):
+    caminho = str(tmp_path / "mov.xlsx")
+    outro = str(tmp_path / "outro.xlsx")
+    guardar("datasets", (caminho, 1, 10), 1)
+    guardar("grade", ((caminho, 2, 10), "pagina"), 2)
+    guardar("datasets", (outro, 1, 10), 3)
+    guardar("rollup", (caminho, "mov_cc"), 4, manter_ao_descartar=True)
+    assert descartar_arquivo(caminho) == 2
+    assert consultar("datasets", (caminho, 1, 10)) is None and consultar("grade", ((caminho, 2, 10), "pagina")) is None
+    assert consultar("datasets", (outro, 1, 10)) == 3
+    assert consultar("rollup", (caminho, "mov_cc")) == 4
+    assert estatisticas_cache()["descartes"] == 2
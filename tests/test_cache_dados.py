@@ -0,0 +1,50 @@
+import os
+import pandas as pd
+import pytest
+import cache_dados
+from cache_dados import impressao_digital, caminho_cache, ler_planilha
+
+@pytest.fixture(autouse=True)
+def pasta_cache(tmp_path, monkeypatch):
+    pasta = str(tmp_path / "cache")
+    monkeypatch.setattr(cache_dados, "PASTA_CACHE", pasta)
+    return pasta
+
+def _gravar(caminho, df, mtime_ns):
+    df.to_excel(caminho, index=False)
+    os.utime(caminho, ns=(mtime_ns, mtime_ns))
+
+def test_impressao_digital_muda_com_o_arquivo(tmp_path):
+    caminho = str(tmp_path / "a.xlsx")
+    _gravar(caminho, pd.DataFrame({"x": [1]}), 1_000_000_000)
+    antes = impressao_digital(caminho)
+    assert antes == (os.path.abspath(caminho), 1_000_000_000, os.path.getsize(caminho))
+    os.utime(caminho, ns=(2_000_000_000, 2_000_000_000))
+    assert impressao_digital(caminho) != antes
+
+def test_segunda_leitura_vem_do_parquet(tmp_path, monkeypatch):
+    caminho = str(tmp_path / "a.xlsx")
+    _gravar(caminho, pd.DataFrame({"x": [1, 2], "y": ["a", "b"]}), 1_000_000_000)
+    primeira = ler_planilha(caminho)
+    assert os.path.exists(caminho_cache(caminho))
+    monkeypatch.setattr(pd, "read_excel", lambda *a, **k: pytest.fail("releu o xlsx"))
+    pd.testing.assert_frame_equal(ler_planilha(caminho), primeira)
+
+def test_arquivo_alterado_apaga_parquet_e_esquema_da_versao_antiga(tmp_path, pasta_cache):
+    caminho = str(tmp_path / "a.xlsx")
+    _gravar(caminho, pd.DataFrame({"x": [1]}), 1_000_000_000)
+    ler_planilha(caminho)
+    antigo = caminho_cache(caminho)
+    esquema_antigo = antigo[:-len(".parquet")] + ".esquema-12345678.json"
+    open(esquema_antigo, "w").close()
+    _gravar(caminho, pd.DataFrame({"x": [1, 2, 3]}), 2_000_000_000)
+    assert ler_planilha(caminho)["x"].tolist() == [1, 2, 3]
+    assert sorted(os.listdir(pasta_cache)) == [os.path.basename(caminho_cache(caminho))]
+
+def test_coluna_de_tipos_mistos_vira_texto_com_vazios(tmp_path):
+    caminho = str(tmp_path / "a.xlsx")
+    _gravar(caminho, pd.DataFrame({"codigo": [1, "A2", None, 3.5]}), 1_000_000_000)
+    primeira = ler_planilha(caminho)
+    assert primeira["codigo"].tolist()[:2] == ["1", "A2"] and primeira["codigo"].isna().tolist() == [False, False, True, False]
+    assert os.path.exists(caminho_cache(caminho))
+    pd.testing.assert_frame_equal(ler_planilha(caminho), primeira)
@@ -0,0 +1,45 @@
+import pandas as pd
+from conciliacao import conciliar, parear_transferencias
+
+def _lado(datas, valores, contas=None):
+    df = pd.DataFrame({"data": pd.to_datetime(datas), "valor": valores})
+    if contas is not None:
+        df["conta"] = contas
+    return df
+
+def test_mesmo_dia_pares_um_a_um():
+    extrato = _lado(["2025-01-01", "2025-01-01"], [10.0, 10.0])
+    mov = _lado(["2025-01-01", "2025-01-01", "2025-01-01"], [10.0, 10.0, 10.0])
+    r = conciliar(extrato, mov, "data", "valor", "data", "valor")
+    assert r["conciliados"]["pos_extrato"].tolist() == [0, 1]
+    assert r["conciliados"]["dias_diferenca"].tolist() == [0, 0]
+    assert len(r["sem_par_movimento"]) == 1
+
+def test_janela_de_tolerancia_e_ambiguos():
+    extrato = _lado(["2025-01-01", "2025-01-10", "2025-02-01"], [10.0, 20.0, 30.0])
+    mov = _lado(["2025-01-03", "2025-01-09", "2025-01-11", "2025-03-01"], [10.0, 20.0, 20.0, 30.0])
+    r = conciliar(extrato, mov, "data", "valor", "data", "valor", tolerancia_dias=3)
+    assert r["conciliados"][["pos_extrato", "pos_movimento", "dias_diferenca"]].values.tolist() == [[0, 0, 2]]
+    assert r["ambiguos"]["pos_extrato"].tolist() == [1]
+    assert r["ambiguos"]["candidatos"].tolist() == [2]
+    assert r["sem_par_extrato"].tolist() == [2]
+    assert r["sem_par_movimento"].tolist() == [3]
+
+def test_conta_diferente_nao_concilia():
+    extrato = _lado(["2025-01-01"], [10.0], ["A"])
+    mov = _lado(["2025-01-01"], [10.0], ["B"])
+    r = conciliar(extrato, mov, "data", "valor", "data", "valor", "conta", "conta")
+    assert r["conciliados"].empty
+
+def test_parear_transferencias_com_estorno():
+    mov = pd.DataFrame({
+        "Data": pd.to_datetime(["2025-01-01", "2025-01-02", "2025-01-05", "2025-01-05", "2025-01-20"]),
+        "Tipo": ["Saída de Transferência", "Entrada de transferência", "Saída de Transferência",
+                 "Estorno Saída de Transferência", "Saída de Transferência"],
+        "Outro": ["x"] * 5,
+    })
+    pernas = parear_transferencias(mov, "Data", "Tipo", pd.Series([100.0, -100.0, 50.0, 50.0, 70.0]))
+    situacao = dict(zip(pernas["posicao"], pernas["Situação"]))
+    assert situacao == {0: "Pareada", 1: "Pareada", 2: "Estornada", 3: "Pareada", 4: "Órfã"}
+    par = dict(zip(pernas["posicao"], pernas["Par"]))
+    assert (par[0], par[1], par[2], par[3], par[4]) == (1, 0, 3, 2, -1)
@@ -0,0 +1,27 @@
+import io
+import pandas as pd
+from exportacao import chave_filtros, gerar_xlsx
+
+def test_ida_e_volta_pelo_excel():
+    df = pd.DataFrame({
+        "Data": pd.to_datetime([pd.Timestamp(2025, 7, 1, 10, 30), None, pd.Timestamp(2025, 7, 3)]),
+        "Valor": [1234.56, None, -0.5],
+        "Status": pd.Series(["Pago", None, "Aberto"], dtype="category"),
+        "Qtd": [1, 2, 3],
+    })
+    lido = pd.read_excel(io.BytesIO(gerar_xlsx(df, "Resultado")), sheet_name="Resultado")
+    assert list(lido.columns) == ["Data", "Valor", "Status", "Qtd"]
+    assert lido["Data"].tolist()[0] == pd.Timestamp("2025-07-01 10:30:00") and pd.isna(lido["Data"][1])
+    assert lido["Valor"].tolist()[0] == 1234.56 and pd.isna(lido["Valor"][1])
+    assert lido["Status"].tolist()[0] == "Pago" and pd.isna(lido["Status"][1])
+    assert lido["Qtd"].tolist() == [1, 2, 3]
+
+def test_resultado_vazio_so_com_cabecalho():
+    lido = pd.read_excel(io.BytesIO(gerar_xlsx(pd.DataFrame(columns=["A", "B"]))))
+    assert list(lido.columns) == ["A", "B"] and lido.empty
+
+def test_chave_muda_com_o_arquivo_e_com_os_filtros():
+    digital = ("/dados/mov.xlsx", 1, 10)
+    assert chave_filtros(digital, "Todos", ["Pago"]) == chave_filtros(digital, "Todos", ["Pago"])
+    assert chave_filtros(digital, "Todos", ["Pago"]) != chave_filtros(digital, "Todos", [])
+    assert chave_filtros(("/dados/mov.xlsx", 2, 10), "Todos", ["Pago"])[0] != digital
@@ -0,0 +1,28 @@
+import pandas as pd
+from facetas import construir_facetas, opcoes_faceta, rotulo_faceta, mascara_facetas, contagens_na_mascara
+
+def _df():
+    return pd.DataFrame({
+        "Status": ["Pago", "Aberto", "Pago", None, "Pago"],
+        "Caixa": ["B", "A", "A", "A", "B"],
+    })
+
+def test_opcoes_em_ordem_com_contagens():
+    facetas = construir_facetas(_df(), ["Status", "Caixa", None, "Inexistente"])
+    assert set(facetas) == {"Status", "Caixa"}
+    assert opcoes_faceta(facetas, "Status") == ["Aberto", "Pago"]
+    assert facetas["Status"]["contagens"].tolist() == [1, 3]
+    assert opcoes_faceta(facetas, "Inexistente") == []
+
+def test_rotulo_com_contagem():
+    facetas = construir_facetas(_df(), ["Caixa"])
+    rotulo = rotulo_faceta(facetas, "Caixa")
+    assert [rotulo(v) for v in ["A", "B", "Z"]] == ["A (3)", "B (2)", "Z"]
+
+def test_mascara_e_contagens_dependentes():
+    facetas = construir_facetas(_df(), ["Status", "Caixa"])
+    mascara = mascara_facetas(facetas, {"Caixa": ["A"], "Status": []})
+    assert mascara.tolist() == [False, True, True, True, False]
+    # Status entre as linhas do caixa A: o vazio não conta
+    assert contagens_na_mascara(facetas, "Status", mascara).tolist() == [1, 1]
+    assert mascara_facetas(facetas, {"Status": []}) is None
@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+import pandas as pd
+from filtros import especificacao_filtros, filtros_ativos, posicoes_filtradas, aplicar_filtros
+from facetas import construir_facetas
+
+def _contas():
+    # Ordenado por data, como deixa periodo.ordenar_por_data
+    return pd.DataFrame({
+        "Data": pd.to_datetime(["2025-01-01", "2025-01-02", "2025-01-02", "2025-01-05", None]),
+        "Status": ["Pago", "Aberto", "Pago", "Pago", "Aberto"],
+        "Caixa": ["A", "B", "B", "A", "A"],
+    })
+
+def test_especificacao_ignora_selecoes_vazias():
+    espec = especificacao_filtros(valores={"Status": [], "Caixa": ["A"], None: ["x"]}, periodo=("Data", None, None))
+    assert espec == {"valores": {"Caixa": ["A"]}, "periodo": None}
+    assert not filtros_ativos(especificacao_filtros())
+
+def test_posicoes_por_valores_e_periodo():
+    df = _contas()
+    espec = especificacao_filtros(valores={"Status": ["Pago"]}, periodo=("Data", "2025-01-02", "2025-01-05"))
+    assert posicoes_filtradas(df, espec).tolist() == [2, 3]
+    assert posicoes_filtradas(df, espec, ordenado=False).tolist() == [2, 3]
+
+def test_facetas_dao_o_mesmo_que_isin():
+    df = _contas()
+    facetas = construir_facetas(df, ["Status", "Caixa"])
+    espec = especificacao_filtros(valores={"Status": ["Aberto"], "Caixa": ["A", "B"]})
+    assert posicoes_filtradas(df, espec, facetas=facetas).tolist() == posicoes_filtradas(df, espec).tolist() == [1, 4]
+
+def test_sem_filtro_devolve_o_proprio_df():
+    df = _contas()
+    assert aplicar_filtros(df, especificacao_filtros()) is df
+
+def test_motor_de_filtros_nao_depende_do_streamlit():
+    codigo = "import sys, filtros, facetas; sys.exit('streamlit' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", codigo], cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).returncode == 0
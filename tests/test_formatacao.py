@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+from formatacao import moeda, formatar_moeda, formatar_percentual
+
+def test_moeda():
+    assert moeda(1234.5) == "R$ 1.234,50"
+    assert moeda(-0.5) == "R$ -0,50"
+
+def test_formatar_moeda_igual_ao_formato_escalar():
+    valores = pd.Series([0, 0.004, -0.004, 1.005, 999.999, 1000, 1_000_000.1, -1234567.891, 12.3, np.nan])
+    esperado = [moeda(v) if pd.notna(v) else "" for v in valores]
+    # Diferença proposital: valor que arredonda para zero sai sem sinal (o f-string daria "R$ -0,00")
+    esperado[2] = "R$ 0,00"
+    assert formatar_moeda(valores).tolist() == esperado
+
+def test_formatar_moeda_preserva_indice_e_vazio():
+    resultado = formatar_moeda(pd.Series([5.0, None], index=[10, 20]), vazio="-")
+    assert resultado.to_dict() == {10: "R$ 5,00", 20: "-"}
+
+def test_formatar_percentual():
+    assert formatar_percentual(pd.Series([0.95, -0.125, np.nan, 12.5])).tolist() == ["95%", "-12%", "-", "1250%"]
+    assert formatar_percentual(pd.Series([0.12346]), casas=2).tolist() == ["12,35%"]
@@ -0,0 +1,60 @@
+import os
+import pandas as pd
+import pytest
+import cache_dados
+import ingestao_paralela
+from cache_dados import ler_planilha
+from ingestao_paralela import numero_workers, ler_planilhas, ler_abas, _para_arrow, _de_arrow
+
+@pytest.fixture
+def pasta_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_dados, "PASTA_CACHE", str(tmp_path / "cache"))
+
+@pytest.fixture
+def pasta_cache_padrao():
+    # Os processos filhos importam cache_dados de novo e gravam na pasta padrão (não veem o
+    # monkeypatch): apaga o que o teste criou lá
+    pasta = cache_dados.PASTA_CACHE
+    antes = set(os.listdir(pasta)) if os.path.isdir(pasta) else set()
+    yield
+    for nome in set(os.listdir(pasta)) - antes if os.path.isdir(pasta) else ():
+        os.remove(os.path.join(pasta, nome))
+
+def _planilha(tmp_path, nome, linhas=20):
+    caminho = str(tmp_path / nome)
+    with pd.ExcelWriter(caminho) as escritor:
+        for aba in ["Jan", "Fev"]:
+            pd.DataFrame({
+                "Data": pd.date_range("2025-01-01", periods=linhas, freq="D"),
+                "Historico": [f"{nome} {aba} {i}" for i in range(linhas)],
+                "Valor": [i * 1.25 for i in range(linhas)],
+            }).to_excel(escritor, sheet_name=aba, index=False)
+    return caminho
+
+def test_numero_workers():
+    assert numero_workers(0, 4) == 1
+    assert numero_workers(3, 8) == 3
+    assert numero_workers(10, 2) == 2
+
+def test_ida_e_volta_pelo_arrow():
+    df = pd.DataFrame({"a": [1.5, None], "b": ["x", None], "c": pd.to_datetime(["2025-01-01", None])})
+    pd.testing.assert_frame_equal(_de_arrow(_para_arrow(df)), df, check_dtype=False)
+    misturado = pd.DataFrame({"a": [1, "x"]})
+    assert _para_arrow(misturado) is misturado and _de_arrow(misturado) is misturado
+    assert _de_arrow(None) is None
+
+def test_leitura_em_serie_igual_a_ler_planilha(tmp_path, pasta_cache):
+    caminhos = [_planilha(tmp_path, "a.xlsx"), _planilha(tmp_path, "b.xlsx")]
+    lidos = ler_planilhas(caminhos + [(caminhos[0], "Fev")], max_workers=2)
+    for caminho in caminhos:
+        pd.testing.assert_frame_equal(lidos[caminho], ler_planilha(caminho))
+    pd.testing.assert_frame_equal(lidos[(caminhos[0], "Fev")], ler_planilha(caminhos[0], sheet_name="Fev"))
+    assert ler_planilhas(caminhos, devolver=False) == {}
+
+def test_leitura_em_processos_igual_a_ler_planilha(tmp_path, pasta_cache_padrao, monkeypatch):
+    monkeypatch.setattr(ingestao_paralela, "LIMITE_SERIAL_BYTES", 0)
+    caminho = _planilha(tmp_path, "a.xlsx")
+    abas = ler_abas(caminho, max_workers=2)
+    assert list(abas) == ["Jan", "Fev"]
+    for aba, df in abas.items():
+        pd.testing.assert_frame_equal(df, ler_planilha(caminho, sheet_name=aba))
@@ -0,0 +1,44 @@
+import datetime
+from openpyxl import Workbook
+from filtros import especificacao_filtros
+from ingestao_stream import ler_em_blocos, resumir_em_blocos, filtrar_em_blocos
+
+def _planilha(tmp_path):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Caixa", "Modalidade", "Data", "Valor"])
+    for i in range(12):
+        ws.append([f"CX {i % 3}", "PIX" if i % 2 else "CREDITO", f"{i + 1:02d}/07/2025", i * 1.5])
+    ws.append([None, None, None, None])  # linha vazia não conta
+    caminho = str(tmp_path / "dcp.xlsx")
+    wb.save(caminho)
+    return caminho
+
+def test_blocos_cobrem_a_planilha(tmp_path):
+    blocos = list(ler_em_blocos(_planilha(tmp_path), tamanho_bloco=5, colunas_data=["Data"]))
+    assert [len(b) for b in blocos] == [5, 5, 2]
+    assert str(blocos[0]["Data"].iloc[0].date()) == "2025-07-01"
+
+def test_resumo_tem_opcoes_contagens_e_periodo(tmp_path):
+    resumo = resumir_em_blocos(_planilha(tmp_path), ["Caixa", "Modalidade"], "Data")
+    assert resumo["linhas"] == 12
+    assert resumo["distintos"]["Caixa"] == ["CX 0", "CX 1", "CX 2"]
+    assert resumo["facetas"]["Modalidade"]["contagens"].tolist() == [6, 6]
+    assert (resumo["data_min"].day, resumo["data_max"].day) == (1, 12)
+
+def test_filtro_com_e_sem_resumo_da_o_mesmo(tmp_path):
+    caminho = _planilha(tmp_path)
+    resumo = resumir_em_blocos(caminho, ["Caixa", "Modalidade"], "Data")
+    espec = especificacao_filtros(
+        valores={"Modalidade": ["PIX"], "Caixa": ["CX 0", "CX 1"]},
+        periodo=("Data", datetime.date(2025, 7, 2), datetime.date(2025, 7, 10)),
+    )
+    pelo_resumo = filtrar_em_blocos(caminho, espec, resumo)
+    bloco_a_bloco = filtrar_em_blocos(caminho, espec)
+    assert pelo_resumo["Valor"].tolist() == bloco_a_bloco["Valor"].tolist() == [1.5, 4.5, 10.5, 13.5]
+
+def test_filtro_sem_linhas_aceitas(tmp_path):
+    caminho = _planilha(tmp_path)
+    resumo = resumir_em_blocos(caminho, ["Caixa"], "Data")
+    vazio = filtrar_em_blocos(caminho, especificacao_filtros(valores={"Caixa": ["CX 9"]}), resumo)
+    assert vazio.empty and list(vazio.columns) == ["Caixa", "Modalidade", "Data", "Valor"]
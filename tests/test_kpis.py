@@ -0,0 +1,43 @@
+import os
+import pandas as pd
+import pytest
+import kpis
+from kpis import somar_kpis
+
+@pytest.fixture(autouse=True)
+def somas_em_tmp(tmp_path, monkeypatch):
+    monkeypatch.setattr(kpis, "PASTA_CACHE", str(tmp_path / "cache"))
+    monkeypatch.setattr(kpis, "ARQUIVO_SOMAS", str(tmp_path / "cache" / "somas_kpis.json"))
+
+def _planilha(tmp_path, nome, valores):
+    caminho = str(tmp_path / nome)
+    pd.DataFrame({"Data": ["01/07/2025"] * len(valores), " Valor ": valores}).to_excel(caminho, index=False)
+    return caminho
+
+def test_soma_igual_a_do_pandas(tmp_path):
+    valores = [10.1, None, -3.35, 1e6, 0.2]
+    caminho = _planilha(tmp_path, "saldo.xlsx", valores)
+    soma, erro = somar_kpis([caminho])[caminho]
+    assert erro is None
+    assert soma == pytest.approx(pd.read_excel(caminho)[" Valor "].sum())
+
+def test_arquivo_inalterado_nao_e_aberto(tmp_path, monkeypatch):
+    caminho = _planilha(tmp_path, "saldo.xlsx", [1.0, 2.0])
+    assert somar_kpis([caminho])[caminho] == (3.0, None)
+    monkeypatch.setattr(kpis, "somar_coluna_valor", lambda c: pytest.fail("abriu o arquivo"))
+    assert somar_kpis([caminho])[caminho] == (3.0, None)
+    os.utime(caminho, ns=(2_000_000_000, 2_000_000_000))  # copiado de novo, mesmo conteúdo
+    assert somar_kpis([caminho])[caminho] == (3.0, None)
+
+def test_arquivo_alterado_e_somado_de_novo(tmp_path):
+    caminho = _planilha(tmp_path, "saldo.xlsx", [1.0, 2.0])
+    somar_kpis([caminho])
+    _planilha(tmp_path, "saldo.xlsx", [5.0, 2.5, 1.0])
+    assert somar_kpis([caminho])[caminho] == (8.5, None)
+
+def test_arquivo_ausente_e_sem_coluna_valor(tmp_path):
+    sem_valor = str(tmp_path / "outro.xlsx")
+    pd.DataFrame({"Total": [1.0]}).to_excel(sem_valor, index=False)
+    ausente = str(tmp_path / "nao_existe.xlsx")
+    resultado = somar_kpis([sem_valor, ausente])
+    assert resultado[sem_valor] == (0.0, None) and resultado[ausente] == (0.0, None)
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+from numeros import converter_numero_br, converter_data_br
+
+def test_numero_formato_brasileiro():
+    serie = pd.Series(["R$ 1.234,56", "1234,5", "(1.234,56)", "-R$ 10,00", "1234.56", "12", "abc", None], dtype=object)
+    resultado = converter_numero_br(serie)
+    esperado = [1234.56, 1234.5, -1234.56, -10.0, 1234.56, 12.0, np.nan, np.nan]
+    np.testing.assert_allclose(resultado.to_numpy(), esperado)
+    assert resultado.dtype == np.float64
+
+def test_numero_misturado_com_valores_do_excel():
+    serie = pd.Series([10, "1.000,00", 2.5, None], dtype=object)
+    np.testing.assert_allclose(converter_numero_br(serie).to_numpy(), [10.0, 1000.0, 2.5, np.nan])
+
+def test_numero_ja_numerico_passa_direto():
+    assert converter_numero_br(pd.Series([1, 2])).tolist() == [1.0, 2.0]
+
+def test_data_dia_primeiro():
+    serie = pd.Series(["05/03/2025", "05/03/2025 14:30", "2025-03-06", "31/02/2025", None], dtype=object)
+    resultado = converter_data_br(serie)
+    assert resultado.iloc[0] == pd.Timestamp("2025-03-05")
+    assert resultado.iloc[1] == pd.Timestamp("2025-03-05 14:30")
+    assert resultado.iloc[2] == pd.Timestamp("2025-03-06")
+    assert pd.isna(resultado.iloc[3]) and pd.isna(resultado.iloc[4])
+
+def test_data_misturada_com_datas_do_excel():
+    serie = pd.Series([pd.Timestamp("2025-01-02"), "03/01/2025"], dtype=object)
+    assert converter_data_br(serie).tolist() == [pd.Timestamp("2025-01-02"), pd.Timestamp("2025-01-03")]
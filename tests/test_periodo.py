@@ -0,0 +1,24 @@
+import pandas as pd
+from periodo import limites_periodo, ordenar_por_data, extremos_periodo
+
+def _datas(*textos):
+    return pd.to_datetime(pd.Series(textos), format="ISO8601").to_numpy()
+
+def test_limites_inclusivos_em_dias_inteiros():
+    datas = _datas("2025-01-01 10:00", "2025-01-02", "2025-01-02 23:59", "2025-01-03", None)
+    assert limites_periodo(datas, "2025-01-02", "2025-01-02") == (1, 3)
+
+def test_limites_sem_datas_excluem_vazios():
+    datas = _datas("2025-01-01", "2025-01-02", None, None)
+    assert limites_periodo(datas) == (0, 2)
+
+def test_limites_periodo_vazio_ou_invertido():
+    datas = _datas("2025-01-01", "2025-01-05")
+    assert limites_periodo(datas, "2025-01-02", "2025-01-04") == (1, 1)
+    assert limites_periodo(datas, "2025-01-05", "2025-01-01") == (1, 1)
+
+def test_ordenar_por_data_converte_texto_brasileiro():
+    df = pd.DataFrame({"Data": ["03/01/2025", None, "01/01/2025"], "v": [3, 0, 1]})
+    ordenado = ordenar_por_data(df, "Data")
+    assert ordenado["v"].tolist() == [1, 3, 0]
+    assert extremos_periodo(ordenado, "Data") == (pd.Timestamp("2025-01-01"), pd.Timestamp("2025-01-03"))
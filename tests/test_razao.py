@@ -0,0 +1,74 @@
+import pandas as pd
+from razao import construir_razao, razao_da_planilha, conferir_razao, saldos_periodo
+from mov_cc import medidas_cards
+
+def _movimentacao():
+    # Duas contas intercaladas, já em ordem de data (como deixa periodo.ordenar_por_data)
+    return pd.DataFrame({
+        "Data": pd.to_datetime(["2025-01-01", "2025-01-02", "2025-01-03", "2025-01-05", "2025-01-06"]),
+        "Conta": ["A", "B", "A", "B", "A"],
+        "Movimento": [10.0, 5.0, -3.0, 2.0, 1.0],
+        "Saldo Anterior": [100.0, 50.0, 110.0, 55.0, 107.0],
+    })
+
+def _razao(df):
+    return construir_razao(df, "Data", df["Movimento"], "Conta", df["Saldo Anterior"])
+
+def test_saldos_do_historico_inteiro():
+    anterior, final = saldos_periodo(_razao(_movimentacao()))
+    assert (anterior, final) == (150.0, 108.0 + 57.0)
+
+def test_saldos_de_um_periodo_e_de_uma_conta():
+    razao = _razao(_movimentacao())
+    assert saldos_periodo(razao, "2025-01-03", "2025-01-05") == (110.0 + 55.0, 107.0 + 57.0)
+    assert saldos_periodo(razao, "2025-01-03", "2025-01-05", contas=["A"]) == (110.0, 107.0)
+
+def test_periodo_sem_lancamentos_mantem_o_saldo():
+    razao = _razao(_movimentacao())
+    assert saldos_periodo(razao, "2025-01-04", "2025-01-04", contas=["A"]) == (107.0, 107.0)
+    assert saldos_periodo(razao, "2024-12-01", "2024-12-31", contas=["A"]) == (100.0, 100.0)
+
+def test_lancamento_sem_data_fica_de_fora():
+    df = _movimentacao()
+    df.loc[4, "Data"] = pd.NaT
+    assert saldos_periodo(_razao(df), contas=["A"]) == (100.0, 107.0)
+
+def _planilha_sem_conta():
+    # Uma sequência só, em ordem de data e inclusão: o Saldo de cada linha é o Saldo Anterior da seguinte
+    return pd.DataFrame({
+        "Data": pd.to_datetime(["2025-01-01", "2025-01-01", "2025-01-03", None]),
+        "Débito": [None, 30.0, None, None],
+        "Crédito": [20.0, None, 5.0, None],
+        "Saldo": [120.0, 90.0, 95.0, 80.0],
+        "Saldo Anterior": [100.0, 120.0, 90.0, None],
+    })
+
+def test_razao_da_planilha_usa_os_saldos_da_planilha():
+    razao = razao_da_planilha(_planilha_sem_conta(), "Data", "Saldo", "Saldo Anterior")
+    assert saldos_periodo(razao) == (100.0, 95.0)
+    assert saldos_periodo(razao, "2025-01-02", "2025-01-03") == (90.0, 95.0)
+    assert saldos_periodo(razao, "2025-02-01", "2025-02-28") == (95.0, 95.0)
+
+def test_razao_fecha_com_o_ultimo_saldo_da_planilha():
+    df = _planilha_sem_conta()
+    medidas = medidas_cards(df, {"debito": "Débito", "credito": "Crédito"})
+    razao = construir_razao(df, "Data", medidas["credito"].fillna(0) - medidas["debito"].fillna(0), None, df["Saldo Anterior"])
+    assert conferir_razao(razao, df, "Data", "Saldo") == []
+    df.loc[1, "Débito"] = 31.0
+    medidas = medidas_cards(df, {"debito": "Débito", "credito": "Crédito"})
+    razao = construir_razao(df, "Data", medidas["credito"].fillna(0) - medidas["debito"].fillna(0), None, df["Saldo Anterior"])
+    assert conferir_razao(razao, df, "Data", "Saldo") == [""]
+
+def test_fecha_por_conta_com_o_saldo_da_planilha():
+    df = _movimentacao().assign(Saldo=[110.0, 55.0, 107.0, 57.0, 108.0])
+    razao = _razao(df)
+    assert conferir_razao(razao, df, "Data", "Saldo", "Conta") == []
+    df.loc[3, "Saldo"] = 60.0
+    assert conferir_razao(razao, df, "Data", "Saldo", "Conta") == ["B"]
+
+def test_medidas_so_com_valor_tem_debito_das_saidas():
+    df = pd.DataFrame({"Valor": [50.0, -20.0, 0.0]})
+    medidas = medidas_cards(df, {"valor": "Valor"})
+    assert medidas["debito"].fillna(0).tolist() == [0.0, 20.0, 0.0]
+    assert medidas["credito"].fillna(0).tolist() == [50.0, 0.0, 0.0]
+    assert (medidas["credito"].fillna(0) - medidas["debito"].fillna(0)).tolist() == [50.0, -20.0, 0.0]
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+import cache_compartilhado as cc
+import rollup
+from rollup import montar_cubo, COLUNA_REGISTROS
+
+@pytest.fixture(autouse=True)
+def cache_vazio(monkeypatch):
+    monkeypatch.setattr(cc, "_itens", type(cc._itens)())
+    monkeypatch.setattr(cc, "_mantidos", set())
+    monkeypatch.setattr(cc, "_uso", {"bytes": 0})
+
+def _movimentos():
+    rng = np.random.default_rng(0)
+    n = 200
+    return pd.DataFrame({
+        "Data": pd.Timestamp("2025-07-01") + pd.to_timedelta(rng.integers(0, 10, n), unit="D") + pd.to_timedelta(rng.integers(0, 86400, n), unit="s"),
+        "Conta": rng.choice(["A", "B", "C"], n),
+        "Valor": rng.normal(0, 100, n).round(2),
+    })
+
+def _cubo(df, chave):
+    return montar_cubo(chave, df, "Data", ["Conta"], df[["Valor"]])
+
+def _ordenado(cubo):
+    return cubo.sort_values(["Data", "Conta"], na_position="last").reset_index(drop=True)
+
+def test_cubo_soma_por_dia_e_dimensao():
+    df = _movimentos()
+    cubo = _cubo(df, "mov")
+    assert cubo["Data"].is_monotonic_increasing
+    assert cubo[COLUNA_REGISTROS].sum() == len(df)
+    esperado = df.groupby([df["Data"].dt.normalize(), "Conta"])["Valor"].sum()
+    assert cubo.set_index(["Data", "Conta"])["Valor"].sort_index().to_numpy() == pytest.approx(esperado.sort_index().to_numpy())
+
+def test_recalculo_incremental_igual_ao_completo(monkeypatch):
+    df = _movimentos()
+    _cubo(df, "mov")
+    alterado = df.copy()
+    dia = pd.Timestamp("2025-07-04")
+    alterado.loc[alterado["Data"].dt.normalize() == dia, "Valor"] += 1.0
+    alterado = pd.concat([alterado, pd.DataFrame({"Data": [pd.NaT], "Conta": ["A"], "Valor": [5.0]})], ignore_index=True)
+    agregados = []
+    agregar = rollup._agregar
+    monkeypatch.setattr(rollup, "_agregar", lambda tabela, *args: agregados.append(tabela) or agregar(tabela, *args))
+    incremental = _cubo(alterado, "mov")
+    # Só o dia alterado e as linhas sem data foram agregados de novo
+    assert set(agregados[0]["Data"].dropna().unique()) == {dia} and agregados[0]["Data"].isna().sum() == 1
+    completo = _cubo(alterado, "outra chave")
+    pd.testing.assert_frame_equal(_ordenado(incremental), _ordenado(completo))
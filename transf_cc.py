@@ -1,10 +1,19 @@
 import streamlit as st
 import os
-import pandas as pd
 import numpy as np
-import io
 from datetime import datetime
-from st_aggrid import AgGrid, GridOptionsBuilder
+from cache_dados import impressao_digital
+from cache_compartilhado import compartilhado
+from esquema import carregar_com_esquema
+from numeros import converter_numero_br
+from formatacao import moeda
+from busca import indice_busca, filtrar_por_busca
+from periodo import ordenar_por_data, fatiar_periodo, limites_periodo
+from exportacao import botao_exportacao, chave_filtros
+from grade import mostrar_grade
+from resultados_filtros import resultado_memorizado
+from conciliacao import parear_transferencias, TOLERANCIA_DIAS
+from mov_cc import prepara_planilha as prepara_movimentacao, medidas_cards, arquivo_movimentacao
 
 def selecionar_arquivo_excel(titulo="Selecione o arquivo Excel:"):
     pasta = os.path.dirname(os.path.abspath(__file__))
@@ -29,6 +38,75 @@ def selecionar_arquivo_excel(titulo="Selecione o arquivo Excel:"):
         st.warning("Nenhum arquivo Excel (.xlsx) encontrado na pasta do projeto.")
     return os.path.join(pasta, arquivo_escolhido) if arquivo_escolhido else None
 
+@compartilhado
+def prepara_planilha(arquivo_selecionado, digital):
+    # Feito uma vez por versão do arquivo: colunas resolvidas (esquema) e datas convertidas e ordenadas
+    df, esquema = carregar_com_esquema(arquivo_selecionado)
+    if esquema.get("data"):
+        df = ordenar_por_data(df, esquema["data"])
+    return df, esquema
+
+@compartilhado
+def pareia_transferencias(arquivo_mov, digital_mov, tolerancia):
+    # Uma vez por versão da planilha de movimentação (e tolerância)
+    mov, esquema_mov, _, _ = prepara_movimentacao(arquivo_mov, digital_mov)
+    if "data" not in esquema_mov or "tipo" not in esquema_mov:
+        return None, mov, esquema_mov
+    medidas = medidas_cards(mov, esquema_mov)
+    pernas = parear_transferencias(
+        mov, esquema_mov["data"], esquema_mov["tipo"], medidas["debito"].fillna(0) + medidas["credito"].fillna(0), tolerancia
+    )
+    return pernas, mov, esquema_mov
+
+@st.fragment
+def mostrar_pareamento(arquivo_selecionado, data_ini, data_fim):
+    # Saídas x entradas de transferência (e estornos) da movimentação de conta corrente, no período.
+    # Fragmento: tolerância e conjunto exibido reexecutam só esta seção.
+    arquivo_mov = arquivo_movimentacao(arquivo_selecionado)
+    if arquivo_mov is None:
+        st.info("Planilha de movimentação de conta corrente não encontrada na pasta das transferências.")
+        return
+    tolerancia = st.number_input(
+        "Tolerância entre as datas (dias)", min_value=0, max_value=30, value=TOLERANCIA_DIAS, step=1, key="tolerancia_tc"
+    )
+    with st.spinner("Pareando transferências..."):
+        pernas, mov, esquema_mov = pareia_transferencias(arquivo_mov, impressao_digital(arquivo_mov), int(tolerancia))
+    if pernas is None:
+        st.info('A movimentação não tem as colunas de data e "Tipo".')
+        return
+    coluna_data, col_tipo = esquema_mov["data"], esquema_mov["tipo"]
+    i, j = limites_periodo(mov[coluna_data].to_numpy(), data_ini, data_fim)
+    pernas = pernas[(pernas["posicao"] >= i) & (pernas["posicao"] < j)]
+
+    situacoes = ["Pareada", "Estornada", "Ambígua", "Órfã"]
+    contagens = pernas["Situação"].value_counts()
+    for coluna_layout, situacao in zip(st.columns(len(situacoes)), situacoes):
+        coluna_layout.metric(situacao, f"{contagens.get(situacao, 0):,}")
+    escolha = st.selectbox("Mostrar pernas", situacoes, index=situacoes.index("Órfã"), key="situacao_pernas_tc")
+    selecionadas = pernas[pernas["Situação"] == escolha]
+    tabela = mov.iloc[selecionadas["posicao"].to_numpy()].reset_index(drop=True)
+    tabela.insert(0, "Papel", selecionadas["Papel"].to_numpy())
+    if escolha != "Órfã":
+        pares = selecionadas["Par"].to_numpy()
+        tabela[f"Par: {col_tipo}"] = np.where(pares >= 0, mov[col_tipo].to_numpy()[pares], None)
+        tabela[f"Par: {coluna_data}"] = np.where(pares >= 0, mov[coluna_data].to_numpy()[pares], None)
+        tabela["Diferença (dias)"] = selecionadas["Diferença (dias)"].to_numpy()
+    st.dataframe(tabela, hide_index=True, use_container_width=True)
+
+def filtra_transferencias(df, esquema, digital, selected_status, busca_manual, data_ini, data_fim):
+    # Posições das linhas aceitas pelos filtros da página
+    df_raw, coluna_data, col_status = df, esquema.get("data"), esquema.get("status")
+    if col_status and selected_status == "Nenhum":
+        df = df.iloc[0:0]  # Mostra nada
+    elif col_status and selected_status != "Todos":
+        df = df[df[col_status].astype(str).str.capitalize() == selected_status]
+    if busca_manual:
+        indice = indice_busca((digital, "transf_cc"), df_raw)
+        df = filtrar_por_busca(df, indice, busca_manual)
+    if coluna_data:
+        df = fatiar_periodo(df, coluna_data, data_ini, data_fim)
+    return df.index.to_numpy()
+
 def show_transf_cc(arquivo_selecionado=None):
     if not arquivo_selecionado:
         arquivo_selecionado = selecionar_arquivo_excel("Selecione o arquivo para Transferências entre Contas Correntes:")
@@ -36,19 +114,15 @@ def show_transf_cc(arquivo_selecionado=None):
         st.stop()
 
     try:
-        xls = pd.ExcelFile(arquivo_selecionado)
-        sheet_name = xls.sheet_names[0]
-        df_raw = pd.read_excel(xls, sheet_name=sheet_name)
+        digital = impressao_digital(arquivo_selecionado)
+        df_raw, esquema = prepara_planilha(arquivo_selecionado, digital)
+        coluna_data = esquema.get("data")
     except Exception as e:
         st.error(f"Erro ao ler o Excel: {e}")
         st.stop()
 
-    df_raw.columns = [col.strip() for col in df_raw.columns]
-    df = df_raw.copy()
-
     # Filtro de Status com selectbox (escala única)
-    col_status = [col for col in df.columns if "status" in col.lower()]
-    col_status = col_status[0] if col_status else None
+    col_status = esquema.get("status")
     status_cores = {
         "Pendente": "#FFF9C4",
         "Efetuado": "#C8E6C9",
@@ -56,6 +130,7 @@ def show_transf_cc(arquivo_selecionado=None):
         "Estornado": "#BBDEFB"
     }
     status_opcoes = ["Todos", "Nenhum"] + list(status_cores.keys())
+    selected_status = "Todos"
     if col_status:
         selected_status = st.selectbox(
             "Status",
@@ -77,20 +152,12 @@ def show_transf_cc(arquivo_selecionado=None):
             ]),
             unsafe_allow_html=True
         )
-        # Filtro de status
-        if selected_status == "Nenhum":
-            df = df.iloc[0:0]  # Mostra nada
-        elif selected_status != "Todos":
-            df = df[df[col_status].astype(str).str.capitalize() == selected_status]
 
     # Campo de busca manual
     busca_manual = st.text_input("Filtrar por texto (procura em todas as colunas):", "", key="busca_manual_tc")
-    if busca_manual:
-        df = df[df.apply(lambda row: row.astype(str).str.contains(busca_manual, case=False, na=False), axis=1).any(axis=1)]
 
-    # Filtro de data (primeira coluna que contém "data")
-    colunas_data = [col for col in df.columns if "data" in col.lower()]
-    coluna_data = colunas_data[0] if colunas_data else None
+    # Filtro de data (primeira coluna que contém "data", já convertida e ordenada no preparo)
+    data_ini = data_fim = None
     if coluna_data:
         st.markdown("<b>Período de busca</b>", unsafe_allow_html=True)
         col1, col2 = st.columns(2)
@@ -98,43 +165,27 @@ def show_transf_cc(arquivo_selecionado=None):
             data_ini = st.date_input("Data Inicial", value=datetime.today().replace(day=1), key="data_ini_tc")
         with col2:
             data_fim = st.date_input("Data Final", value=datetime.today(), key="data_fim_tc")
-        data_ini = pd.to_datetime(data_ini)
-        data_fim = pd.to_datetime(data_fim)
-        df[coluna_data] = pd.to_datetime(df[coluna_data], errors="coerce")
-        if data_ini and data_fim:
-            mask = (df[coluna_data] >= data_ini) & (df[coluna_data] <= data_fim)
-            df = df[mask]
-        elif data_fim:
-            df = df[df[coluna_data] <= data_fim]
+
+    # Filtros aplicados uma vez por estado; reruns sem mudança de filtro reaproveitam o resultado
+    estado = (selected_status, busca_manual, data_ini, data_fim)
+    posicoes = resultado_memorizado(
+        (digital, "transf_cc"), estado, lambda: filtra_transferencias(df_raw, esquema, digital, *estado)
+    )
+    df = df_raw.iloc[posicoes]
 
     # >>>>>>> SOMA DINÂMICA DA COLUNA VALOR <<<<<<<
-    col_valor = None
-    for col in df.columns:
-        if "valor" == col.lower().strip():
-            col_valor = col
-            break
+    col_valor = esquema.get("valor")
 
     if col_valor:
-        soma_valor = df[col_valor].replace(",", ".", regex=True)
-        soma_valor = pd.to_numeric(soma_valor, errors='coerce').sum()
+        soma_valor = converter_numero_br(df[col_valor]).sum()
         st.markdown(
             f"""<div style='font-size:2.2em;font-weight:bold;color:#17c964;margin:20px 0 12px 0;'>
-                Total do Valor: R$ {soma_valor:,.2f}
+                Total do Valor: {moeda(soma_valor)}
             </div>""", unsafe_allow_html=True
         )
 
-    # Exportação
-    st.write("## Exportar resultado para Excel")
-    output = io.BytesIO()
-    nome_arquivo = f"resultado_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name='Resultado')
-    st.download_button(
-        label=f"Baixar resultado filtrado ({nome_arquivo})",
-        data=output.getvalue(),
-        file_name=nome_arquivo,
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
+    # Exportação (gerada só a pedido); a chave é o mesmo `estado` que filtrou as linhas
+    botao_exportacao(df, "transf_cc", chave_filtros(digital, *estado))
 
     # Contagem de registros
     st.markdown(
@@ -145,18 +196,10 @@ def show_transf_cc(arquivo_selecionado=None):
 
     # AG-GRID para mostrar a tabela filtrada
     if not df.empty:
-        gb = GridOptionsBuilder.from_dataframe(df)
-        gb.configure_default_column(editable=False, groupable=True, resizable=True)
-        gb.configure_side_bar()
-        grid_options = gb.build()
-        AgGrid(
-            df,
-            gridOptions=grid_options,
-            enable_enterprise_modules=False,
-            allow_unsafe_jscode=True,
-            theme="material",
-            height=680,
-            use_container_width=True
-        )
+        mostrar_grade(df, df_raw, (digital, "transf_cc"), "tc")
     else:
         st.info("Nenhum dado para exibir.")
+
+    # PAREAMENTO DAS PERNAS DE TRANSFERÊNCIA
+    with st.expander("Pareamento de saídas e entradas de transferência"):
+        mostrar_pareamento(arquivo_selecionado, data_ini, data_fim)
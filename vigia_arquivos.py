@@ -0,0 +1,160 @@
+import os
+import threading
+import time
+import streamlit as st
+from cache_dados import impressao_digital
+from cache_compartilhado import descartar_arquivo
+from aquecimento import recarregar
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:  # sem watchdog: só a varredura periódica
+    Observer = None
+    FileSystemEventHandler = object
+
+# Vigia das pastas de dados: quando um export chega (ou é substituído/apagado), só aquele arquivo
+# é relido para o cache, os resultados que dependiam dele são refeitos e as sessões abertas
+# recebem o aviso "dados atualizados". Usa inotify (watchdog); sem ele, varre as pastas.
+# POWEBI_VIGIAR=0 desliga.
+VIGIAR = os.environ.get("POWEBI_VIGIAR", "1") != "0"
+PASTAS_DADOS = ["dashboard", "financeiro", "contas_pagar", "contas_receber", "orcamento"]
+# Varredura (s) quando não há inotify
+INTERVALO_VARREDURA = 5
+# O arquivo só é relido depois de ficar este tempo (s) sem mudar: o export é gravado aos poucos
+ESPERA_ESTAVEL = 2
+# Intervalo (s) em que cada sessão confere se há dados novos
+INTERVALO_AVISO = 5
+
+_trava = threading.Lock()
+_estado = {"iniciado": False, "versao": 0, "alterados": [], "erros": []}
+_pendentes = {}  # caminho -> (impressão digital ou None se apagado, momento da última mudança)
+
+def _eh_planilha(caminho):
+    nome = os.path.basename(caminho)
+    return nome.lower().endswith(".xlsx") and not nome.startswith("~$")
+
+def _digital(caminho):
+    try:
+        return impressao_digital(caminho)
+    except OSError:
+        return None  # apagado (ou ainda sendo movido)
+
+def _marcar(caminho):
+    if _eh_planilha(caminho):
+        with _trava:
+            _pendentes[os.path.abspath(caminho)] = (_digital(caminho), time.time())
+
+class _Eventos(FileSystemEventHandler):
+    def on_any_event(self, event):
+        # Aberturas/fechamentos (a própria leitura das planilhas) não contam
+        if event.is_directory or event.event_type not in ("created", "modified", "moved", "deleted"):
+            return
+        _marcar(event.src_path)
+        if getattr(event, "dest_path", None):  # renomeado/movido para a pasta
+            _marcar(event.dest_path)
+
+def _varrer(pastas):
+    # {caminho: impressão digital} de todas as planilhas das pastas
+    arquivos = {}
+    for pasta in pastas:
+        for raiz, _, nomes in os.walk(pasta):
+            for nome in nomes:
+                caminho = os.path.abspath(os.path.join(raiz, nome))
+                if _eh_planilha(caminho):
+                    digital = _digital(caminho)
+                    if digital:
+                        arquivos[caminho] = digital
+    return arquivos
+
+def _estaveis():
+    # Tira da fila os arquivos que pararam de mudar há ESPERA_ESTAVEL segundos
+    agora = time.time()
+    prontos = []
+    with _trava:
+        for caminho, (digital, momento) in list(_pendentes.items()):
+            atual = _digital(caminho)
+            if atual != digital:
+                _pendentes[caminho] = (atual, agora)  # ainda sendo gravado
+            elif agora - momento >= ESPERA_ESTAVEL:
+                prontos.append(caminho)
+                del _pendentes[caminho]
+    return prontos
+
+def _atualizar(raiz, caminhos):
+    for caminho in caminhos:
+        descartar_arquivo(caminho)
+    erros = recarregar(raiz, [c for c in caminhos if os.path.exists(c)])
+    with _trava:
+        _estado["versao"] += 1
+        _estado["alterados"] = [os.path.basename(c) for c in caminhos]
+        _estado["erros"] = erros
+
+def _laco(raiz, pastas, observador):
+    # `conhecidos`: versão de cada planilha já no cache; evento sem mudança de versão é ignorado
+    # `varrida`: resultado da última varredura (sem inotify), para marcar só o que mudou desde ela
+    conhecidos = _varrer(pastas)
+    varrida = dict(conhecidos)
+    while True:
+        time.sleep(1 if observador is not None else INTERVALO_VARREDURA)
+        if observador is None:
+            atuais = _varrer(pastas)
+            for caminho in set(atuais) | set(varrida):
+                if atuais.get(caminho) != varrida.get(caminho):
+                    _marcar(caminho)
+            varrida = atuais
+        prontos = [c for c in _estaveis() if _digital(c) != conhecidos.get(c)]
+        for caminho in prontos:
+            digital = _digital(caminho)
+            if digital:
+                conhecidos[caminho] = digital
+            else:
+                conhecidos.pop(caminho, None)
+        if prontos:
+            _atualizar(raiz, prontos)
+
+def iniciar_vigia(raiz):
+    # Uma vez por processo, como a pré-carga
+    with _trava:
+        if _estado["iniciado"] or not VIGIAR:
+            return
+        _estado["iniciado"] = True
+    pastas = [os.path.join(raiz, p) for p in PASTAS_DADOS if os.path.isdir(os.path.join(raiz, p))]
+    observador = None
+    if Observer is not None:
+        try:
+            observador = Observer()
+            for pasta in pastas:
+                observador.schedule(_Eventos(), pasta, recursive=True)
+            observador.daemon = True
+            observador.start()
+        except Exception:
+            observador = None  # limite de inotify do sistema, sistema de arquivos de rede etc.
+    threading.Thread(target=_laco, args=(raiz, pastas, observador), name="vigia_arquivos", daemon=True).start()
+
+def estado_vigia():
+    with _trava:
+        return {**_estado, "alterados": list(_estado["alterados"]), "erros": list(_estado["erros"])}
+
+@st.fragment(run_every=INTERVALO_AVISO)
+def _conferir_versao():
+    # Só este fragmento roda a cada INTERVALO_AVISO; a página é reexecutada apenas se há dados novos
+    estado = estado_vigia()
+    if estado["versao"] != st.session_state.versao_dados:
+        st.session_state.versao_dados = estado["versao"]
+        st.session_state.aviso_dados = estado
+        st.rerun(scope="app")
+
+def aviso_atualizacao():
+    # Barra lateral: avisa e recarrega a página quando um arquivo das pastas de dados muda
+    estado = estado_vigia()
+    if not estado["iniciado"]:
+        return
+    if "versao_dados" not in st.session_state:
+        st.session_state.versao_dados = estado["versao"]
+    aviso = st.session_state.pop("aviso_dados", None)
+    if aviso:
+        st.toast(f"🔄 Dados atualizados: {', '.join(aviso['alterados'])}")
+        for erro in aviso["erros"]:
+            st.toast(f"⚠️ {erro}")
+    _conferir_versao()